@@ -14,7 +14,10 @@ DEMO_MODE  = False
 # ----------------------------------------------------
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 LLM_MODEL = os.getenv("MODEL_NAME", "llama-3.3-70b-versatile")
+LLM_SMALL_MODEL = os.getenv("SMALL_MODEL_NAME", "llama-3.1-8b-instant")
+LLM_ROUTER_THRESHOLD = int(os.getenv("LLM_ROUTER_THRESHOLD", "3"))  # score >= -> large model
 LLM_TEMPERATURE = 0.2
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "8"))  # fields per packed prompt
 
 # ----------------------------------------------------
 # PATHS
@@ -26,6 +29,112 @@ FIREBASE_CRED_PATH = os.path.join(BASE_DIR, "config", "shonali-desh-19ead-fireba
 
 # Flood model path
 FLOOD_MODEL_PATH = os.path.join(BASE_DIR, "models", "flood_model.pkl")
+FLOOD_NATIVE_PATH = os.path.join(BASE_DIR, "models", "flood_model.npz")  # array export of the pkl
+
+# Local runtime data (checkpoints, caches, stores)
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(BASE_DIR, "data"))
+
+# ----------------------------------------------------
+# Graph checkpoints (resumable runs)
+# ----------------------------------------------------
+CHECKPOINT_DB_PATH = os.path.join(DATA_DIR, "checkpoints.sqlite")
+CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", str(24 * 3600)))
+RUN_COALESCE_STALE_SECONDS = 600  # a field's in-flight run older than this is ignored
+
+# ----------------------------------------------------
+# Cross-process tool cache (shared by all gunicorn workers)
+# ----------------------------------------------------
+SHARED_CACHE_DB_PATH = os.path.join(DATA_DIR, "tool_cache.sqlite")
+CACHE_TTL_SATELLITE = 6 * 3600
+CACHE_TTL_CARBON = 24 * 3600
+CACHE_TTL_FLOOD = 12 * 3600
+
+# ----------------------------------------------------
+# Async job queue (POST /jobs)
+# ----------------------------------------------------
+JOBS_DB_PATH = os.path.join(DATA_DIR, "jobs.sqlite")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 0 = run workers in a separate process
+JOB_WEBHOOK_TIMEOUT = 10
+JOB_HEARTBEAT_SECONDS = 15   # running jobs are marked alive this often
+JOB_STALE_SECONDS = 90       # no heartbeat for this long -> worker gone, requeue
+
+# ----------------------------------------------------
+# Consultation history API
+# ----------------------------------------------------
+HISTORY_PAGE_MAX = 100
+HISTORY_CACHE_FIELDS = 512      # fields kept in the per-process LRU
+HISTORY_CACHE_TTL_SECONDS = 60  # bounds staleness across worker processes
+
+# ----------------------------------------------------
+# Retention / compaction job
+# ----------------------------------------------------
+READINGS_RAW_RETENTION_DAYS = int(os.getenv("READINGS_RAW_RETENTION_DAYS", "14"))
+CONSULTATION_RETENTION_DAYS = int(os.getenv("CONSULTATION_RETENTION_DAYS", "180"))
+CONSULTATION_KEEP_MIN = 20            # always keep the latest N live
+RETENTION_UPDATE_BATCH = 500          # paths per multi-path update
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+
+# ----------------------------------------------------
+# Regional carbon / NDVI rollups
+# ----------------------------------------------------
+AGGREGATES_DB_PATH = os.path.join(DATA_DIR, "aggregates.sqlite")
+
+# ----------------------------------------------------
+# Precomputed flood-risk grid (Bangladesh bounding box)
+# ----------------------------------------------------
+FLOOD_GRID_DIR = os.path.join(DATA_DIR, "flood_grid")
+FLOOD_GRID_BOUNDS = {"lat_min": 20.6, "lat_max": 26.7, "lon_min": 88.0, "lon_max": 92.7}
+FLOOD_GRID_STEP = float(os.getenv("FLOOD_GRID_STEP", "0.1"))  # degrees (~11 km)
+
+# ----------------------------------------------------
+# Per-field Sentinel-2 index time series
+# ----------------------------------------------------
+SATELLITE_SERIES_DIR = os.path.join(DATA_DIR, "satellite")
+SATELLITE_SERIES_START = "2024-01-01"
+
+# ----------------------------------------------------
+# Local daily temperature store (Open-Meteo sync)
+# ----------------------------------------------------
+TEMPERATURE_STORE_DIR = os.path.join(DATA_DIR, "temperature")
+TEMPERATURE_CELL_STEP = 0.1           # degrees; nearby fields share a cell
+TEMPERATURE_HISTORY_START = "2020-01-01"
+TEMPERATURE_RESYNC_SECONDS = 6 * 3600
+TEMPERATURE_RETRY_SECONDS = 600       # backoff after a failed Open-Meteo download
+
+# ----------------------------------------------------
+# Sensor listener (event-driven re-analysis)
+# ----------------------------------------------------
+LISTENER_DEBOUNCE_SECONDS = float(os.getenv("LISTENER_DEBOUNCE_SECONDS", "30"))
+LISTENER_MIN_INTERVAL_SECONDS = float(os.getenv("LISTENER_MIN_INTERVAL_SECONDS", "1800"))
+LISTENER_MAX_WORKERS = int(os.getenv("LISTENER_MAX_WORKERS", "2"))
+SENSOR_THRESHOLDS = {
+    "soilMoisture": {"low": 20.0, "high": 80.0, "delta": 10.0},
+    "soilTemp": {"low": 10.0, "high": 38.0, "delta": 5.0},
+}
+
+# ----------------------------------------------------
+# Retrieval of past consultations (sentence-transformers + FAISS)
+# ----------------------------------------------------
+RETRIEVAL_DIR = os.path.join(DATA_DIR, "retrieval")
+RETRIEVAL_MODEL = os.getenv("RETRIEVAL_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+RETRIEVAL_REUSE_THRESHOLD = float(os.getenv("RETRIEVAL_REUSE_THRESHOLD", "0.93"))   # cosine; reuse as-is
+RETRIEVAL_FEWSHOT_THRESHOLD = float(os.getenv("RETRIEVAL_FEWSHOT_THRESHOLD", "0.75"))  # cosine; prompt examples
+RETRIEVAL_FEWSHOT_K = 2
+RETRIEVAL_PERSIST_SECONDS = 300  # index snapshot interval (SQLite is the source of truth)
+
+# ----------------------------------------------------
+# Admission control (per process, in front of the graph)
+# ----------------------------------------------------
+ADMISSION_SLOTS = int(os.getenv("ADMISSION_SLOTS", "4"))  # concurrent graph runs
+ADMISSION_CLASSES = {
+    # max_wait: seconds a request may queue before it is shed (429)
+    # max_active: slots one class may hold at once (None = all)
+    "flood_alert": {"weight": 6, "max_queue": 50, "max_wait": 120.0, "max_active": None},
+    "interactive": {"weight": 3, "max_queue": 20, "max_wait": 30.0, "max_active": None},
+    "batch": {"weight": 1, "max_queue": 10, "max_wait": 600.0, "max_active": max(1, ADMISSION_SLOTS // 2)},
+}
+ADMISSION_CLASSIFY_FIELDS = 4096       # per-process LRU of field priority lookups
+ADMISSION_CLASSIFY_TTL_SECONDS = 300   # how long a field's flood promotion is reused
 
 # ----------------------------------------------------
 # Carbon factors
@@ -1,5 +1,6 @@
 # graph.py
 
+import uuid
 from langgraph.graph import StateGraph, END
 from state import AgentState
 
@@ -9,11 +10,14 @@ from nodes.fetch_nodes import (
     node_fetch_satellite,
     node_fetch_carbon,
     node_fetch_flood,
+    config_error,
+    field_location,
 )
 
 from nodes.problem_nodes import node_detect_problems
 from nodes.solution_node import node_plan_solutions
 from tools.firebase_tools import save_agent_output_tool
+from services.checkpoints import checkpointer, run_config, register_run, maybe_purge
 
 
 def node_save_output(state: AgentState) -> AgentState:
@@ -24,12 +28,72 @@ def node_save_output(state: AgentState) -> AgentState:
         "field_id": state.field_id,
         "problems": state.problems or [],
         "solutions": state.solutions or [],
-        "carbon_data": state.carbon_data or None
+        "carbon_data": state.carbon_data or None,
+        "crop_type": (state.field_config or {}).get("cropType"),
+        "reused_from": state.reused_from,
     })
 
     return state
 
 
+# Nodes after the config fetch, in execution order
+PIPELINE = [
+    "fetch_iot",
+    "fetch_satellite",
+    "fetch_carbon",
+    "fetch_flood",
+    "detect_problems",
+    "plan_solutions",
+    "save_output",
+]
+
+
+def node_abort(state: AgentState) -> AgentState:
+    """End a run that cannot succeed (unknown farmer/field) without backend/LLM work."""
+    state.error = {
+        **config_error(state),
+        "farmer_id": state.farmer_id,
+        "field_id": state.field_id,
+    }
+    state.skipped = state.skipped + [
+        {"node": name, "reason": state.error["code"]} for name in PIPELINE
+    ]
+    return state
+
+
+def route_after_config(state: AgentState) -> str:
+    return "abort" if config_error(state) else "fetch_iot"
+
+
+# ---------------------------------------------------------
+# Per-node preconditions (None = run, str = skip reason)
+# ---------------------------------------------------------
+def needs_location(state: AgentState):
+    return None if field_location(state) else "missing_location"
+
+
+def needs_problems(state: AgentState):
+    return None if state.problems else "no_problems"
+
+
+def skip_reason(state: AgentState, name: str, precondition) -> str | None:
+    """Check a precondition; record the skip on the state if it fails."""
+    reason = precondition(state)
+    if reason is not None:
+        state.skipped = state.skipped + [{"node": name, "reason": reason}]
+    return reason
+
+
+def guarded(name: str, node, precondition):
+    """Skip `node` (and record why) when its inputs are missing."""
+    def _run(state: AgentState) -> AgentState:
+        if skip_reason(state, name, precondition) is not None:
+            return state
+        return node(state)
+
+    return _run
+
+
 # ---------------------------------------------------------
 # Build LangGraph Pipeline
 # ---------------------------------------------------------
@@ -37,19 +101,27 @@ builder = StateGraph(AgentState)
 
 # Register nodes
 builder.add_node("fetch_field_and_farmer", node_fetch_field_and_farmer)
+builder.add_node("abort", node_abort)
 builder.add_node("fetch_iot", node_fetch_iot)
-builder.add_node("fetch_satellite", node_fetch_satellite)
-builder.add_node("fetch_carbon", node_fetch_carbon)
-builder.add_node("fetch_flood", node_fetch_flood)
+builder.add_node("fetch_satellite", guarded("fetch_satellite", node_fetch_satellite, needs_location))
+builder.add_node("fetch_carbon", guarded("fetch_carbon", node_fetch_carbon, needs_location))
+builder.add_node("fetch_flood", guarded("fetch_flood", node_fetch_flood, needs_location))
 builder.add_node("detect_problems", node_detect_problems)
-builder.add_node("plan_solutions", node_plan_solutions)
+builder.add_node("plan_solutions", guarded("plan_solutions", node_plan_solutions, needs_problems))
 builder.add_node("save_output", node_save_output)
 
 # Entry point
 builder.set_entry_point("fetch_field_and_farmer")
 
+# Unknown farmer/field ends the run right after the config fetch
+builder.add_conditional_edges(
+    "fetch_field_and_farmer",
+    route_after_config,
+    {"abort": "abort", "fetch_iot": "fetch_iot"},
+)
+builder.add_edge("abort", END)
+
 # Pipeline edges (execution order)
-builder.add_edge("fetch_field_and_farmer", "fetch_iot")
 builder.add_edge("fetch_iot", "fetch_satellite")
 builder.add_edge("fetch_satellite", "fetch_carbon")   # NEW
 builder.add_edge("fetch_carbon", "fetch_flood")
@@ -60,3 +132,51 @@ builder.add_edge("save_output", END)
 
 # Compile graph
 field_agent_graph = builder.compile()
+
+# Same pipeline, checkpointed after every node (used by /run_once)
+checkpointed_graph = builder.compile(checkpointer=checkpointer)
+
+
+# ---------------------------------------------------------
+# Resumable run helper
+# ---------------------------------------------------------
+class RunConflict(Exception):
+    """run_id already belongs to a different farmer/field."""
+
+
+def _check_owner(values: dict, farmer_id: str, field_id: str, run_id: str):
+    owner = (values.get("farmer_id"), values.get("field_id"))
+    if owner != (farmer_id, field_id):
+        raise RunConflict(f"Run {run_id} belongs to a different field")
+
+
+def run_field_agent(farmer_id: str, field_id: str, run_id: str | None = None) -> dict:
+    """
+    Run the pipeline under a run ID. If the run already exists, continue
+    from its last completed node (or return its result if it finished).
+    """
+    run_id = run_id or uuid.uuid4().hex
+    config = run_config(run_id)
+
+    maybe_purge()
+
+    snapshot = checkpointed_graph.get_state(config)
+    if snapshot.values:
+        _check_owner(snapshot.values, farmer_id, field_id, run_id)
+
+    if snapshot.next:
+        # Interrupted earlier (e.g. LLM rate limit) -> resume
+        print(f"[graph] Resuming run {run_id} at {list(snapshot.next)}")
+        result = checkpointed_graph.invoke(None, config)
+    elif snapshot.values:
+        # Already completed -> idempotent retry
+        result = dict(snapshot.values)
+    else:
+        register_run(run_id)
+        result = checkpointed_graph.invoke(
+            {"farmer_id": farmer_id, "field_id": field_id},
+            config,
+        )
+
+    result["run_id"] = run_id
+    return result
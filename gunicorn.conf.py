@@ -0,0 +1,31 @@
+# gunicorn.conf.py
+#
+# Multi-worker deployment:
+#   gunicorn server:app -c gunicorn.conf.py
+#
+# Read-only assets are loaded once in the master before forking, so all
+# workers share them copy-on-write. Network clients (Firebase, Earth
+# Engine, Groq) and SQLite connections are still created per worker.
+
+import gc
+import os
+import multiprocessing
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+
+# Run job workers in one dedicated process (python -m workers.job_queue)
+# instead of once per HTTP worker, unless explicitly configured.
+os.environ.setdefault("JOB_WORKERS", "0")
+
+
+def on_starting(server):
+    # Imported only for its side effect: the flood model (+ NumPy) loads in
+    # the master before fork and is inherited by every worker
+    import tools.flood_tools  # noqa: F401
+
+    # Keep preloaded objects out of GC scans so refcount updates do not
+    # dirty (and copy) the shared pages in each worker
+    gc.freeze()
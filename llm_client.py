@@ -1,11 +1,153 @@
+import time
+import threading
+from collections import deque
+
 from langchain_groq import ChatGroq
-from config.settings import GROQ_API_KEY, LLM_MODEL, LLM_TEMPERATURE
+from config.settings import (
+    GROQ_API_KEY,
+    LLM_MODEL,
+    LLM_SMALL_MODEL,
+    LLM_TEMPERATURE,
+    LLM_ROUTER_THRESHOLD,
+)
 
-def get_llm():
+def get_llm(max_tokens: int = 2048, model: str = LLM_MODEL):
     llm = ChatGroq(
         api_key=GROQ_API_KEY,
-        model=LLM_MODEL,
+        model=model,
         temperature=LLM_TEMPERATURE,
-        max_tokens=2048
+        max_tokens=max_tokens
     )
     return llm
+
+
+# ----------------------------------------------------
+# Complexity score for a consultation
+# ----------------------------------------------------
+def score_complexity(state) -> int:
+    """
+    Rough difficulty of a consultation from its inputs.
+    0 = nothing notable; higher = more anomalies / conflicting signals.
+    """
+    score = 0
+
+    flood = (state.flood_risk or {}).get("flood_risk")
+    if flood == "high":
+        score += 3
+    elif flood == "medium":
+        score += 1
+
+    feats = state.iot_features or {}
+    moisture = (feats.get("soilMoisture") or {}).get("latest")
+    for metric in ("soilMoisture", "soilTemp", "humidity"):
+        m = feats.get(metric) or {}
+        score += int(bool(m.get("anomaly"))) + int(bool(m.get("stuck")))
+
+    pred = (state.field_config or {}).get("latestPrediction") or {}
+    if pred.get("nitrogenStatus") not in (None, "", "normal", "optimal"):
+        score += 1
+    if pred.get("salinityRisk") not in (None, "", "low", "none"):
+        score += 1
+
+    # Conflicting signals: dry soil while a flood is predicted
+    if moisture is not None and moisture < 20 and flood in ("medium", "high"):
+        score += 2
+
+    if (state.satellite_data or {}).get("error") or (state.flood_risk or {}).get("error"):
+        score += 1
+
+    score += max(0, len(state.problems or []) - 3)
+    return score
+
+
+# ----------------------------------------------------
+# Router: small model for simple cases, large for the rest
+# ----------------------------------------------------
+class LLMRouter:
+    """
+    Send a prompt to the small or large model based on a complexity score.
+    If `parse` rejects the small model's output, escalate to the large one.
+    API errors (rate limits, auth, timeouts) are counted and re-raised,
+    never escalated, so a failed run can be resumed from its checkpoint.
+    Models only need an `invoke(messages)` returning an object with `.content`.
+    """
+
+    def __init__(self, small, large, threshold: int = LLM_ROUTER_THRESHOLD, history: int = 200):
+        self.models = {"small": small, "large": large}
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._stats = {
+            name: {"calls": 0, "errors": 0, "total_latency_s": 0.0}
+            for name in self.models
+        }
+        self._escalations = 0
+        self._decisions = deque(maxlen=history)
+
+    def _call(self, name: str, messages):
+        start = time.perf_counter()
+        try:
+            return self.models[name].invoke(messages).content
+        except Exception as e:
+            print(f"[llm_router] {name} model failed: {e}")
+            with self._lock:
+                self._stats[name]["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._stats[name]["calls"] += 1
+                self._stats[name]["total_latency_s"] += time.perf_counter() - start
+
+    def invoke(self, messages, complexity: int, parse, label: str = ""):
+        """Return parse(content) from the chosen model, or None if unusable."""
+        name = "large" if complexity >= self.threshold else "small"
+        parsed = parse(self._call(name, messages))
+        escalated = False
+
+        if parsed is None and name == "small":
+            escalated = True
+            parsed = parse(self._call("large", messages))
+
+        with self._lock:
+            self._escalations += int(escalated)
+            self._decisions.append({
+                "label": label,
+                "complexity": complexity,
+                "model": name,
+                "escalated": escalated,
+                "ok": parsed is not None,
+                "at": time.time(),
+            })
+
+        return parsed
+
+    def stats(self) -> dict:
+        with self._lock:
+            per_model = {
+                name: {
+                    **s,
+                    "avg_latency_s": (s["total_latency_s"] / s["calls"]) if s["calls"] else None,
+                }
+                for name, s in self._stats.items()
+            }
+            return {
+                "threshold": self.threshold,
+                "models": per_model,
+                "escalations": self._escalations,
+                "recent": list(self._decisions)[-20:],
+            }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> LLMRouter:
+    """Process-wide router with Groq models (small=LLM_SMALL_MODEL, large=LLM_MODEL)."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = LLMRouter(
+                small=get_llm(max_tokens=1024, model=LLM_SMALL_MODEL),
+                large=get_llm(),
+            )
+    return _router
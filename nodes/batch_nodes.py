@@ -0,0 +1,152 @@
+# nodes/batch_nodes.py
+#
+# Batched LLM mode: pack K fields into one request so the system prompt
+# is paid once per batch instead of once per field. Fields the model
+# drops or mangles fall back to the single-field nodes.
+
+import json
+from state import AgentState
+from langchain_core.messages import SystemMessage, HumanMessage
+from llm_client import get_llm
+from config.settings import LLM_BATCH_SIZE
+
+from nodes.problem_nodes import extract_json, problem_context, node_detect_problems
+from nodes.solution_node import (
+    solution_context,
+    similar_cases,
+    reuse_solutions,
+    node_plan_solutions,
+)
+
+llm = get_llm(max_tokens=8192)
+
+# Not useful for diagnosis; dropped to keep packed prompts small
+_DROP_KEYS = {"farmer_name", "phone", "village", "farmer_id", "field_id", "debug"}
+
+
+BATCH_PROBLEM_PROMPT = """
+You are an agricultural expert AI.
+
+The input is a JSON object mapping FIELD KEYS to field data.
+Detect the problems of EACH field independently.
+
+STRICT RULES:
+- Output ONLY STRICT VALID JSON. No markdown. No explanation.
+- Use exactly the same field keys as the input. Do not skip any field.
+- For each field, only an array of strings inside "problems".
+
+Format:
+{
+  "<field key>": {"problems": ["string", "string"]},
+  "<field key>": {"problems": ["string"]}
+}
+"""
+
+BATCH_SOLUTION_PROMPT = """You are one of Bangladesh’s leading agricultural scientists and an expert in carbon-smart agriculture.
+
+The input is a JSON object mapping FIELD KEYS to each field's problems and data.
+Plan solutions for EACH field independently.
+
+Rules (must be followed with absolute strictness):
+- Do not write anything except STRICT VALID JSON. No markdown. No explanations.
+- Use exactly the same field keys as the input. Do not skip any field.
+- For each field, provide solutions only as an array of "string" items.
+- Every solution must be low-cost, environmentally friendly, and supportive of reducing carbon emissions.
+
+Format:
+{
+  "<field key>": {"solutions": ["string", "string"]},
+  "<field key>": {"solutions": ["string"]}
+}
+"""
+
+
+# -------------------------------------------------------
+# Helpers
+# -------------------------------------------------------
+def field_key(state: AgentState) -> str:
+    return f"{state.farmer_id}/{state.field_id}"
+
+
+def _compact(context: dict) -> dict:
+    """Drop empty values and identity fields from a field context."""
+    out = {}
+    for k, v in context.items():
+        if v is None or k in _DROP_KEYS:
+            continue
+        if isinstance(v, dict):
+            v = _compact(v)
+            if not v:
+                continue
+        out[k] = v
+    return out
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _run_packed(states, system_prompt, build_context, result_key):
+    """
+    One LLM call for a chunk of fields.
+    Returns {field_key: [str, ...]} for fields the model answered correctly.
+    """
+    payload = {field_key(s): _compact(build_context(s)) for s in states}
+
+    try:
+        response = llm.invoke([
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=json.dumps(payload)),
+        ])
+        parsed = extract_json(response.content)
+    except Exception as e:
+        print(f"[batch_nodes] Packed request failed: {e}")
+        parsed = None
+
+    if not isinstance(parsed, dict):
+        return {}
+
+    results = {}
+    for key in payload:
+        entry = parsed.get(key)
+        if isinstance(entry, dict) and isinstance(entry.get(result_key), list):
+            results[key] = [str(x) for x in entry[result_key]]
+
+    return results
+
+
+# -------------------------------------------------------
+# Batch nodes
+# -------------------------------------------------------
+def detect_problems_batch(states: list, batch_size: int = LLM_BATCH_SIZE) -> list:
+    for chunk in _chunks(states, batch_size):
+        results = _run_packed(chunk, BATCH_PROBLEM_PROMPT, problem_context, "problems")
+
+        for state in chunk:
+            key = field_key(state)
+            if key in results:
+                state.problems = results[key]
+            else:
+                print(f"[batch_nodes] {key}: missing from batch, retrying alone")
+                node_detect_problems(state)
+
+    return states
+
+
+def plan_solutions_batch(states: list, batch_size: int = LLM_BATCH_SIZE) -> list:
+    # Fields matching a past consultation closely reuse its solutions
+    pending = [s for s in states if not reuse_solutions(s, similar_cases(s))]
+
+    for chunk in _chunks(pending, batch_size):
+        results = _run_packed(chunk, BATCH_SOLUTION_PROMPT, solution_context, "solutions")
+
+        for state in chunk:
+            key = field_key(state)
+            if key in results:
+                state.solutions = results[key]
+            else:
+                print(f"[batch_nodes] {key}: missing from batch, retrying alone")
+                node_plan_solutions(state)
+
+    return states
@@ -2,9 +2,37 @@
 
 from state import AgentState
 from tools.firebase_tools import fetch_field_config_tool, fetch_iot_data_tool
+from tools.iot_analytics import field_features
 from tools.satellite_tools import fetch_satellite_tool
 from tools.flood_tools import fetch_flood_risk_tool
-from tools.carbon_tools import fetch_carbon_from_ndvi
+from tools.carbon_tools import fetch_carbon_from_ndvi, parse_field_size_ha
+from services.aggregates import upsert_field
+
+
+# ---------------------------------------------------------
+# Preconditions
+# ---------------------------------------------------------
+def field_location(state: AgentState):
+    cfg = state.field_config or {}
+    loc = cfg.get("location") if isinstance(cfg, dict) else None
+    if not isinstance(loc, dict) or loc.get("lat") is None or loc.get("lon") is None:
+        return None
+    return loc
+
+
+def config_error(state: AgentState) -> dict | None:
+    """Structured reason the run cannot continue after the config fetch."""
+    cfg = state.field_config
+    if not isinstance(cfg, dict):
+        return {"code": "config_unavailable", "message": "Field config could not be loaded."}
+
+    if cfg.get("error"):
+        return {
+            "code": cfg["error"],
+            "message": cfg.get("debug") or cfg["error"],
+        }
+
+    return None
 
 
 # ---------------------------------------------------------
@@ -26,6 +54,7 @@ def node_fetch_iot(state: AgentState) -> AgentState:
         "farmer_id": state.farmer_id,
         "field_id": state.field_id,
     })
+    state.iot_features = field_features(f"{state.farmer_id}/{state.field_id}")
     return state
 
 
@@ -61,9 +90,15 @@ def node_fetch_carbon(state: AgentState) -> AgentState:
     state.carbon_data = fetch_carbon_from_ndvi.invoke({
         "lat": lat,
         "lon": lon,
-        "area_ha": 1.0
+        "area_ha": parse_field_size_ha(cfg.get("fieldSize")),
     })
 
+    # Keep region / district / upazila totals current
+    try:
+        upsert_field(cfg, state.carbon_data)
+    except Exception as e:
+        print(f"[fetch_nodes] Aggregate update failed: {e}")
+
     return state
 
 
@@ -3,9 +3,11 @@
 import json
 from state import AgentState
 from langchain_core.messages import SystemMessage, HumanMessage
-from llm_client import get_llm
+from llm_client import get_router, score_complexity
+from tools.iot_analytics import compact_iot_context
 
-llm = get_llm()
+router = get_router()
+llm = router.models["large"]
 
 
 # -------------------------------------------------------
@@ -42,6 +44,13 @@ def extract_json(text: str):
     return None
 
 
+def _parse_problems(text: str):
+    parsed = extract_json(text)
+    if isinstance(parsed, dict) and isinstance(parsed.get("problems"), list):
+        return [str(p) for p in parsed["problems"]]
+    return None
+
+
 # -------------------------------------------------------
 # Utility: generate fallback problems automatically
 # -------------------------------------------------------
@@ -56,6 +65,38 @@ def generate_fallback_problems(state: AgentState):
     except:
         pass
 
+    # Sensor trends / faults (from IoT analytics)
+    try:
+        feats = state.iot_features or {}
+        sm = feats.get("soilMoisture", {})
+        slope = sm.get("slope_per_hour")
+        if slope is not None and slope < -0.5:
+            problems.append(f"Soil is drying quickly ({slope} per hour). Plan irrigation soon.")
+        if sm.get("latest") is not None and sm["latest"] > 80:
+            problems.append(f"Soil moisture is very high ({sm['latest']}). Possible waterlogging.")
+        if feats.get("diurnal_temp_range", 0) > 15:
+            problems.append(f"Large daily soil temperature swing ({feats['diurnal_temp_range']}°C).")
+        for metric in ("soilMoisture", "soilTemp", "humidity"):
+            m = feats.get(metric, {})
+            if m.get("stuck"):
+                problems.append(f"{metric} sensor appears stuck. Check the device.")
+            elif m.get("anomaly"):
+                problems.append(f"Unusual {metric} reading ({m.get('latest')}). Verify sensor or field.")
+    except:
+        pass
+
+    # Satellite index trends
+    try:
+        trend = (state.satellite_data or {}).get("trend", {})
+        ndre_slope = trend.get("NDRE", {}).get("slope_per_30d")
+        if ndre_slope is not None and ndre_slope < -0.05:
+            problems.append("Crop nitrogen index (NDRE) has been falling in recent satellite scenes.")
+        ndssi_slope = trend.get("NDSSI", {}).get("slope_per_30d")
+        if ndssi_slope is not None and ndssi_slope > 0.05:
+            problems.append("Soil salinity index (NDSSI) is rising in recent satellite scenes.")
+    except:
+        pass
+
     # Nitrogen / salinity
     try:
         pred = state.field_config.get("latestPrediction", {})
@@ -80,6 +121,18 @@ def generate_fallback_problems(state: AgentState):
     return problems
 
 
+# -------------------------------------------------------
+# LLM input for one field (shared with batch mode)
+# -------------------------------------------------------
+def problem_context(state: AgentState) -> dict:
+    return {
+        "field_config": state.field_config,
+        "iot_data": compact_iot_context(state.iot_data, state.iot_features),
+        "satellite_data": state.satellite_data,
+        "flood_risk": state.flood_risk,
+    }
+
+
 # -------------------------------------------------------
 # Main problem-detection node
 # -------------------------------------------------------
@@ -106,27 +159,26 @@ Format:
 """
 
     # Prepare LLM input
-    user_payload = json.dumps({
-        "field_config": state.field_config,
-        "iot_data": state.iot_data,
-        "satellite_data": state.satellite_data,
-        "flood_risk": state.flood_risk,
-    })
+    user_payload = json.dumps(problem_context(state))
 
     # ---------------------------------------------------
     # FIRST ATTEMPT
     # ---------------------------------------------------
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_payload),
-    ])
-
-    parsed = extract_json(response.content)
-
-    if parsed and "problems" in parsed:
-        if isinstance(parsed["problems"], list):
-            state.problems = [str(p) for p in parsed["problems"]]
-            return state
+    # Small model for simple fields, large for complex ones (escalates
+    # to the large model if the small one returns unusable output)
+    problems = router.invoke(
+        [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_payload),
+        ],
+        complexity=score_complexity(state),
+        parse=_parse_problems,
+        label="detect_problems",
+    )
+
+    if problems is not None:
+        state.problems = problems
+        return state
 
     # ---------------------------------------------------
     # SECOND ATTEMPT (hard retry)
@@ -3,9 +3,13 @@
 import json
 from state import AgentState
 from langchain_core.messages import SystemMessage, HumanMessage
-from llm_client import get_llm
+from llm_client import get_router, score_complexity
+from tools.iot_analytics import compact_iot_context
+from services import retrieval
+from config.settings import RETRIEVAL_REUSE_THRESHOLD, RETRIEVAL_FEWSHOT_THRESHOLD
 
-llm = get_llm()
+router = get_router()
+llm = router.models["large"]
 
 
 def extract_json(text: str):
@@ -25,8 +29,56 @@ def extract_json(text: str):
             return None
 
 
+def _parse_solutions(text: str):
+    parsed = extract_json(text)
+    if isinstance(parsed, dict) and isinstance(parsed.get("solutions"), list):
+        return [str(s) for s in parsed["solutions"]]
+    return None
+
+
+def solution_context(state: AgentState, examples: list | None = None) -> dict:
+    """LLM input for one field (shared with batch mode)."""
+    context = {
+        "problems": state.problems,
+        "field_config": state.field_config,
+        "iot_data": compact_iot_context(state.iot_data, state.iot_features),
+        "satellite_data": state.satellite_data,
+        "flood_risk": state.flood_risk,
+    }
+    if examples:
+        context["similar_past_cases"] = [
+            {"problems": e["problems"], "solutions": e["solutions"]} for e in examples
+        ]
+    return context
+
+
+def similar_cases(state: AgentState) -> list:
+    """Past consultations above the few-shot threshold, best first."""
+    crop_type = (state.field_config or {}).get("cropType")
+    try:
+        hits = retrieval.nearest(crop_type, state.problems)
+    except Exception as e:
+        print(f"[solution_node] Retrieval failed: {e}")
+        return []
+    return [h for h in hits if h["score"] >= RETRIEVAL_FEWSHOT_THRESHOLD]
+
+
+def reuse_solutions(state: AgentState, cases: list) -> bool:
+    """Take the closest past answer as-is when it is near-identical."""
+    if cases and cases[0]["score"] >= RETRIEVAL_REUSE_THRESHOLD:
+        state.solutions = list(cases[0]["solutions"])
+        state.reused_from = cases[0]["source_key"]
+        return True
+    return False
+
+
 def node_plan_solutions(state: AgentState) -> AgentState:
 
+    # Near-identical past consultation -> no generation at all
+    cases = similar_cases(state)
+    if reuse_solutions(state, cases):
+        return state
+
     # STRICT — Array of strings only
     system_prompt = """You are one of Bangladesh’s leading agricultural scientists and an expert in carbon-smart agriculture.
 
@@ -37,6 +89,7 @@ Rules (must be followed with absolute strictness):
 - Do not use any objects.
 - Provide solutions only as an array of "string" items.
 - Every solution you provide must be low-cost, environmentally friendly, and supportive of reducing carbon emissions.
+- "similar_past_cases", if present, are vetted answers for similar fields; adapt what fits this field.
 
 
 Format:
@@ -48,26 +101,23 @@ Format:
   ]
 }
 """
-    user_payload = json.dumps({
-        "problems": state.problems,
-        "field_config": state.field_config,
-        "iot_data": state.iot_data,
-        "satellite_data": state.satellite_data,
-        "flood_risk": state.flood_risk,
-    })
+    user_payload = json.dumps(solution_context(state, cases))
 
     # ----------------------
     # FIRST ATTEMPT
     # ----------------------
-    response = llm.invoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=user_payload),
-    ])
-
-    parsed = extract_json(response.content)
-
-    if parsed and "solutions" in parsed and isinstance(parsed["solutions"], list):
-        state.solutions = [str(s) for s in parsed["solutions"]]
+    solutions = router.invoke(
+        [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=user_payload),
+        ],
+        complexity=score_complexity(state),
+        parse=_parse_solutions,
+        label="plan_solutions",
+    )
+
+    if solutions is not None:
+        state.solutions = solutions
         return state
 
     # ----------------------
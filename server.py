@@ -1,8 +1,21 @@
 # server.py
-from fastapi import FastAPI
+import json
+import time
+import uuid
+import hashlib
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Request as HttpRequest, Response
 from pydantic import BaseModel
-from graph import field_agent_graph
-from state import AgentState
+from graph import RunConflict, field_agent_graph, run_field_agent
+from services.aggregates import LEVELS, get_rollups
+from workers.job_queue import JobWorkerPool, enqueue, get_job
+from config.settings import JOB_WORKERS, HISTORY_PAGE_MAX
+from tools.firebase_tools import fetch_consultations_page, rtdb_get_keys
+from services.singleflight import SingleFlight
+from services.checkpoints import claim_field_run, finish_run, wait_for_run
+from services import retrieval
+from services.admission import Overloaded, admission, classify
+from llm_client import get_router
 from langserve import add_routes
 import uvicorn
 
@@ -11,19 +24,217 @@ app = FastAPI(title="Field Guardian AI Agent")
 class Request(BaseModel):
     farmer_id: str
     field_id: str
+    run_id: str | None = None  # pass the same ID to resume a failed run
+    priority: Literal["interactive", "batch"] = "interactive"  # flood_alert is set server-side
+
+
+# Concurrent identical consultations share one graph run: SingleFlight
+# within this process, the runs table (claim_field_run) across workers
+_inflight_runs = SingleFlight()
+
+
+def _join_run(req: Request, run_id: str, priority: str) -> dict:
+    """Wait for the field's run started by another worker process."""
+    start = time.monotonic()
+    status = wait_for_run(run_id)
+    if status != "done":
+        raise RuntimeError(f"Coalesced run {run_id} did not complete ({status or 'timeout'})")
+
+    # Finished run -> run_field_agent returns its stored result
+    result = run_field_agent(req.farmer_id, req.field_id, run_id)
+    return {
+        **result,
+        "coalesced": True,
+        "priority": priority,
+        "queue_wait_s": round(time.monotonic() - start, 3),
+    }
+
+
+def _admitted_run(req: Request) -> dict:
+    priority = classify(req.farmer_id, req.field_id, req.priority)
+
+    run_id, claimed = req.run_id, False
+    if run_id is None:
+        new_id = uuid.uuid4().hex
+        run_id = claim_field_run(req.farmer_id, req.field_id, new_id)
+        if run_id != new_id:
+            return _join_run(req, run_id, priority)
+        claimed = True
+
+    status = "failed"
+    try:
+        with admission.slot(priority) as wait:
+            result = run_field_agent(req.farmer_id, req.field_id, run_id)
+        status = "done"
+    finally:
+        if claimed:
+            finish_run(run_id, status)
+    return {**result, "priority": priority, "queue_wait_s": round(wait, 3)}
 
 
 @app.post("/run_once")
 def run_once(req: Request):
-    initial: AgentState = {
-        "farmer_id": req.farmer_id,
-        "field_id": req.field_id,
-    }
-    result = field_agent_graph.invoke(initial)
+    key = ("run", req.run_id) if req.run_id else (req.farmer_id, req.field_id)
+    try:
+        # Only the leader of a coalesced group takes an admission slot
+        result, shared = _inflight_runs.do(key, lambda: _admitted_run(req))
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=429,
+            detail={"priority": e.priority, "reason": e.reason},
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except RunConflict:
+        raise HTTPException(status_code=409, detail="run_id_conflict")
+
+    # A coalesced caller may have joined a run_id started for another field
+    if (result.get("farmer_id"), result.get("field_id")) != (req.farmer_id, req.field_id):
+        raise HTTPException(status_code=409, detail="run_id_conflict")
+
+    if result.get("error"):
+        status = 404 if result["error"]["code"].endswith("_not_found") else 422
+        raise HTTPException(
+            status_code=status,
+            detail={
+                "run_id": result["run_id"],
+                "error": result["error"],
+                "skipped": result.get("skipped", []),
+            },
+        )
+
     return {
+        "run_id": result["run_id"],
+        "coalesced": shared or result.get("coalesced", False),
         "problems": result.get("problems", []),
         "solutions": result.get("solutions", []),
+        "skipped": result.get("skipped", []),
+        "reused_from": result.get("reused_from"),
+        "priority": result["priority"],
+        "queue_wait_s": result["queue_wait_s"],
+    }
+
+class JobRequest(BaseModel):
+    farmer_id: str
+    field_id: str
+    webhook_url: str | None = None  # POSTed the finished job
+    priority: Literal["interactive", "batch"] = "interactive"  # flood_alert is set server-side
+
+
+job_pool = JobWorkerPool(n_workers=JOB_WORKERS)
+
+
+@app.on_event("startup")
+def start_job_workers():
+    if JOB_WORKERS > 0:
+        job_pool.start()
+
+
+@app.on_event("startup")
+def load_retrieval_index():
+    # Embedding model + FAISS index per worker, before the first request
+    try:
+        retrieval.warm_up()
+    except Exception as e:
+        print(f"[server] Retrieval warm-up failed: {e}")
+
+
+@app.on_event("shutdown")
+def save_retrieval_index():
+    retrieval.persist_if_dirty()
+
+
+@app.post("/jobs", status_code=202)
+def create_job(req: JobRequest):
+    priority = classify(req.farmer_id, req.field_id, req.priority)
+    job_id = enqueue(req.farmer_id, req.field_id, req.webhook_url, priority)
+    return {"job_id": job_id, "status": "queued", "priority": priority}
+
+
+@app.get("/jobs/{job_id}")
+def read_job(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job_not_found")
+    return job
+
+
+def _etag_response(payload: dict, request: HttpRequest, response: Response):
+    """Attach an ETag; answer 304 if the client already has this page."""
+    body = json.dumps(payload, sort_keys=True, default=str).encode()
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return payload
+
+
+def _check_limit(limit: int) -> int:
+    if not 1 <= limit <= HISTORY_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be 1..{HISTORY_PAGE_MAX}")
+    return limit
+
+
+@app.get("/farmers/{farmer_id}/fields/{field_id}/consultations")
+def field_consultations(
+    farmer_id: str,
+    field_id: str,
+    request: HttpRequest,
+    response: Response,
+    limit: int = 20,
+    cursor: str | None = None,
+):
+    """Past AI consultations of one field, newest first."""
+    page = fetch_consultations_page(farmer_id, field_id, _check_limit(limit), cursor)
+    return _etag_response(page, request, response)
+
+
+@app.get("/farmers/{farmer_id}/consultations")
+def farmer_consultations(
+    farmer_id: str,
+    request: HttpRequest,
+    response: Response,
+    limit: int = 20,
+    cursor: str | None = None,
+):
+    """Past AI consultations across all fields of a farmer, newest first."""
+    limit = _check_limit(limit)
+
+    # Push keys are time-ordered across fields, so the same cursor works for each
+    merged, more = [], False
+    for field_id in rtdb_get_keys(f"Farmers/{farmer_id}/Fields"):
+        page = fetch_consultations_page(farmer_id, field_id, limit, cursor)
+        merged.extend(page["items"])
+        more = more or page["next_cursor"] is not None
+
+    merged.sort(key=lambda x: x["id"], reverse=True)
+    items = merged[:limit]
+    has_more = more or len(merged) > limit
+
+    page = {
+        "items": items,
+        "next_cursor": items[-1]["id"] if has_more and items else None,
     }
+    return _etag_response(page, request, response)
+
+
+@app.get("/aggregates/{level}")
+def aggregates(level: str, name: str | None = None):
+    """Carbon / NDVI totals per region, district or upazila."""
+    if level not in LEVELS:
+        raise HTTPException(status_code=400, detail=f"level must be one of {list(LEVELS)}")
+    return {"level": level, "rollups": get_rollups(level, name)}
+
+@app.get("/llm/stats")
+def llm_stats():
+    """Model routing decisions and per-model latency (this process)."""
+    return get_router().stats()
+
+@app.get("/admission/stats")
+def admission_stats():
+    """Slots in use, queue depth and queue-wait times per priority class (this process)."""
+    return admission.stats()
 
 # LangGraph API
 add_routes(app, field_agent_graph, path="/field_agent")
@@ -0,0 +1,219 @@
+# services/admission.py
+#
+# Admission control in front of the field agent graph. A fixed number of
+# run slots is shared by priority classes; waiting requests are granted
+# slots by smooth weighted round robin over the non-empty class queues.
+# Full queues, per-class concurrency caps and wait budgets shed work with
+# `Overloaded` (-> 429 + Retry-After in the API).
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from config.settings import (
+    ADMISSION_SLOTS,
+    ADMISSION_CLASSES,
+    ADMISSION_CLASSIFY_FIELDS,
+    ADMISSION_CLASSIFY_TTL_SECONDS,
+)
+
+
+class Overloaded(Exception):
+    def __init__(self, priority: str, reason: str, retry_after: int):
+        super().__init__(f"{priority}: {reason}")
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    def __init__(self, priority: str):
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class AdmissionController:
+    """
+    `classes` maps priority -> {"weight", "max_queue", "max_wait", "max_active"}.
+    max_active caps how many slots one class may hold, so long batch runs
+    can never occupy every slot.
+    """
+
+    def __init__(self, slots: int = ADMISSION_SLOTS, classes: dict = ADMISSION_CLASSES, history: int = 500):
+        self.slots = slots
+        self.classes = classes
+        self._cond = threading.Condition()
+        self._queues = {name: deque() for name in classes}
+        self._active = {name: 0 for name in classes}
+        self._credit = {name: 0 for name in classes}   # smooth WRR state
+        self._service_s = 30.0                         # EWMA of slot hold time
+        self._waits = {name: deque(maxlen=history) for name in classes}
+        self._counts = {
+            name: {"admitted": 0, "rejected": 0, "timed_out": 0}
+            for name in classes
+        }
+
+    # ---------------------------------------------
+    # Scheduling (caller holds self._cond)
+    # ---------------------------------------------
+    def _eligible(self, name: str) -> bool:
+        cap = self.classes[name].get("max_active") or self.slots
+        return bool(self._queues[name]) and self._active[name] < cap
+
+    def _dispatch(self):
+        """Hand free slots to waiting tickets in weighted fair order."""
+        granted = False
+        while sum(self._active.values()) < self.slots:
+            ready = [name for name in self._queues if self._eligible(name)]
+            if not ready:
+                break
+
+            total = sum(self.classes[name]["weight"] for name in ready)
+            for name in ready:
+                self._credit[name] += self.classes[name]["weight"]
+            pick = max(ready, key=lambda name: self._credit[name])
+            self._credit[pick] -= total
+
+            ticket = self._queues[pick].popleft()
+            ticket.granted = True
+            self._active[pick] += 1
+            granted = True
+
+        if granted:
+            self._cond.notify_all()
+
+    def _retry_after(self) -> int:
+        ahead = sum(len(q) for q in self._queues.values()) + 1
+        return max(1, math.ceil(self._service_s * ahead / self.slots))
+
+    def _reject(self, priority: str, reason: str, key: str = "rejected"):
+        self._counts[priority][key] += 1
+        raise Overloaded(priority, reason, self._retry_after())
+
+    # ---------------------------------------------
+    # Public API
+    # ---------------------------------------------
+    def acquire(self, priority: str, timeout: float | None = None) -> float:
+        """Block until a slot is granted; returns the queue wait in seconds."""
+        if priority not in self.classes:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        cfg = self.classes[priority]
+        budget = cfg["max_wait"] if timeout is None else timeout
+
+        with self._cond:
+            if len(self._queues[priority]) >= cfg["max_queue"]:
+                self._reject(priority, "queue_full")
+
+            ticket = _Ticket(priority)
+            self._queues[priority].append(ticket)
+            self._dispatch()
+
+            deadline = ticket.enqueued_at + budget
+            while not ticket.granted:
+                if math.isinf(budget):
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queues[priority].remove(ticket)
+                    self._reject(priority, "wait_budget_exceeded", key="timed_out")
+                self._cond.wait(remaining)
+
+            wait = time.monotonic() - ticket.enqueued_at
+            self._waits[priority].append(wait)
+            self._counts[priority]["admitted"] += 1
+            return wait
+
+    def release(self, priority: str, held_s: float | None = None):
+        with self._cond:
+            self._active[priority] -= 1
+            if held_s is not None:
+                self._service_s = 0.8 * self._service_s + 0.2 * held_s
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: str, timeout: float | None = None):
+        wait = self.acquire(priority, timeout)
+        start = time.monotonic()
+        try:
+            yield wait
+        finally:
+            self.release(priority, time.monotonic() - start)
+
+    def stats(self) -> dict:
+        with self._cond:
+            per_class = {}
+            for name in self.classes:
+                waits = sorted(self._waits[name])
+                per_class[name] = {
+                    **self._counts[name],
+                    "queued": len(self._queues[name]),
+                    "active": self._active[name],
+                    "wait_avg_s": round(sum(waits) / len(waits), 3) if waits else None,
+                    "wait_p95_s": round(waits[int(0.95 * (len(waits) - 1))], 3) if waits else None,
+                    "wait_max_s": round(waits[-1], 3) if waits else None,
+                }
+            return {
+                "slots": self.slots,
+                "in_use": sum(self._active.values()),
+                "avg_service_s": round(self._service_s, 2),
+                "classes": per_class,
+            }
+
+
+# -------------------------------------------------------
+# Priority of a field run
+# -------------------------------------------------------
+# (farmer_id, field_id) -> (stored_at, "flood_alert" | "interactive")
+_classified: OrderedDict = OrderedDict()
+_classified_lock = threading.Lock()
+
+
+def _lookup_class(farmer_id: str, field_id: str) -> str:
+    from tools.firebase_tools import rtdb_get
+    from tools.flood_tools import known_flood_risk
+
+    try:
+        loc = rtdb_get(f"Farmers/{farmer_id}/Fields/{field_id}/location") or {}
+        risk = known_flood_risk(loc.get("lat"), loc.get("lon"))
+    except Exception as e:
+        print(f"[admission] Could not classify {farmer_id}/{field_id}: {e}")
+        return "interactive"
+
+    return "flood_alert" if risk == "high" else "interactive"
+
+
+def classify(farmer_id: str, field_id: str, requested: str = "interactive") -> str:
+    """
+    Callers may only ask for "interactive" or "batch"; interactive runs
+    for fields in a currently high flood-risk cell are promoted to
+    "flood_alert". Uses already known risk only (grid / shared cache);
+    the result is kept per field for ADMISSION_CLASSIFY_TTL_SECONDS so
+    repeated requests do not add an RTDB read ahead of the queue.
+    """
+    if requested == "batch":
+        return "batch"
+
+    key = (farmer_id, field_id)
+    with _classified_lock:
+        entry = _classified.get(key)
+        if entry is not None and time.time() - entry[0] <= ADMISSION_CLASSIFY_TTL_SECONDS:
+            _classified.move_to_end(key)
+            return entry[1]
+
+    priority = _lookup_class(farmer_id, field_id)
+
+    with _classified_lock:
+        _classified[key] = (time.time(), priority)
+        _classified.move_to_end(key)
+        while len(_classified) > ADMISSION_CLASSIFY_FIELDS:
+            _classified.popitem(last=False)
+    return priority
+
+
+# Process-wide controller shared by the API and in-process job workers
+admission = AdmissionController()
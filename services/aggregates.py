@@ -0,0 +1,240 @@
+# services/aggregates.py
+
+import os
+import sqlite3
+import threading
+import time
+
+from config.settings import AGGREGATES_DB_PATH
+
+LEVELS = ("region", "district", "upazila")
+
+
+# -------------------------------------------------------
+# Materialized rollup store (SQLite)
+# -------------------------------------------------------
+os.makedirs(os.path.dirname(AGGREGATES_DB_PATH), exist_ok=True)
+
+_conn = sqlite3.connect(AGGREGATES_DB_PATH, check_same_thread=False)
+_lock = threading.Lock()
+
+with _lock:
+    _conn.executescript("""
+        CREATE TABLE IF NOT EXISTS fields (
+            field_key    TEXT PRIMARY KEY,
+            farmer_id    TEXT,
+            field_id     TEXT,
+            region       TEXT,
+            district     TEXT,
+            upazila      TEXT,
+            area_ha      REAL,
+            ndvi         REAL,
+            total_carbon REAL,
+            revenue      REAL,
+            updated_at   REAL
+        );
+
+        CREATE TABLE IF NOT EXISTS rollups (
+            level        TEXT NOT NULL,
+            name         TEXT NOT NULL,
+            n_fields     INTEGER NOT NULL DEFAULT 0,
+            area_ha      REAL NOT NULL DEFAULT 0,
+            total_carbon REAL NOT NULL DEFAULT 0,
+            revenue      REAL NOT NULL DEFAULT 0,
+            ndvi_sum     REAL NOT NULL DEFAULT 0,
+            ndvi_count   INTEGER NOT NULL DEFAULT 0,
+            n_unknown_area INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (level, name)
+        );
+    """)
+    # Stores created before n_unknown_area existed
+    columns = [c[1] for c in _conn.execute("PRAGMA table_info(rollups)")]
+    if "n_unknown_area" not in columns:
+        _conn.execute(
+            "ALTER TABLE rollups ADD COLUMN n_unknown_area INTEGER NOT NULL DEFAULT 0"
+        )
+    _conn.commit()
+
+
+def _contribution(row: dict, sign: int):
+    """Delta a single field adds to (or removes from) each rollup."""
+    ndvi = row.get("ndvi")
+    return (
+        sign,
+        sign * (row.get("area_ha") or 0.0),
+        sign * (row.get("total_carbon") or 0.0),
+        sign * (row.get("revenue") or 0.0),
+        sign * (ndvi or 0.0),
+        sign * (1 if ndvi is not None else 0),
+        sign * (1 if row.get("area_ha") is None else 0),
+    )
+
+
+def _apply(row: dict, sign: int):
+    """Add (sign=1) or remove (sign=-1) a field from its region rollups."""
+    delta = _contribution(row, sign)
+
+    for level in LEVELS:
+        name = row.get(level)
+        if not name:
+            continue
+
+        _conn.execute(
+            "INSERT OR IGNORE INTO rollups (level, name) VALUES (?, ?)",
+            (level, name),
+        )
+        _conn.execute(
+            "UPDATE rollups SET"
+            " n_fields = n_fields + ?,"
+            " area_ha = area_ha + ?,"
+            " total_carbon = total_carbon + ?,"
+            " revenue = revenue + ?,"
+            " ndvi_sum = ndvi_sum + ?,"
+            " ndvi_count = ndvi_count + ?,"
+            " n_unknown_area = n_unknown_area + ?"
+            " WHERE level = ? AND name = ?",
+            (*delta, level, name),
+        )
+
+    _conn.execute("DELETE FROM rollups WHERE n_fields <= 0")
+
+
+# -------------------------------------------------------
+# Incremental update (called whenever a field's carbon changes)
+# -------------------------------------------------------
+def upsert_field(field_config: dict, carbon_data: dict | None):
+    """
+    Replace one field's contribution in the rollups (no full recompute).
+    Fields with an unknown size count towards NDVI but not area/carbon.
+    """
+    if not isinstance(field_config, dict) or field_config.get("error"):
+        return
+
+    farmer_id = field_config.get("farmer_id")
+    field_id = field_config.get("field_id")
+    if not farmer_id or not field_id:
+        return
+
+    # A failed NDVI fetch keeps the field's last known contribution
+    if not carbon_data or carbon_data.get("ndvi") is None:
+        return
+
+    viewport = carbon_data.get("viewport_method") or {}
+
+    new = {
+        "field_key": f"{farmer_id}/{field_id}",
+        "farmer_id": farmer_id,
+        "field_id": field_id,
+        "region": field_config.get("region"),
+        "district": field_config.get("district"),
+        "upazila": field_config.get("upazila"),
+        "area_ha": viewport.get("area_ha"),
+        "ndvi": carbon_data["ndvi"],
+        "total_carbon": viewport.get("totalCarbon"),
+        "revenue": viewport.get("revenue"),
+        "updated_at": time.time(),
+    }
+
+    with _lock:
+        cur = _conn.execute(
+            "SELECT * FROM fields WHERE field_key = ?", (new["field_key"],)
+        )
+        old = cur.fetchone()
+
+        if old is not None:
+            cols = [c[0] for c in cur.description]
+            _apply(dict(zip(cols, old)), -1)
+
+        _apply(new, 1)
+
+        _conn.execute(
+            "INSERT OR REPLACE INTO fields VALUES ("
+            ":field_key, :farmer_id, :field_id, :region, :district, :upazila,"
+            " :area_ha, :ndvi, :total_carbon, :revenue, :updated_at)",
+            new,
+        )
+        _conn.commit()
+
+
+# -------------------------------------------------------
+# Dashboard queries (read materialized rows only)
+# -------------------------------------------------------
+def _rollup_dict(row) -> dict:
+    level, name, n, area, carbon, revenue, ndvi_sum, ndvi_count, n_unknown_area = row
+    return {
+        "level": level,
+        "name": name,
+        "n_fields": n,
+        "n_unknown_area": n_unknown_area,  # fields left out of area/carbon/revenue
+        "area_ha": area,
+        "total_carbon": carbon,
+        "revenue": revenue,
+        "mean_ndvi": (ndvi_sum / ndvi_count) if ndvi_count else None,
+    }
+
+
+def get_rollups(level: str, name: str | None = None) -> list:
+    if level not in LEVELS:
+        raise ValueError(f"level must be one of {LEVELS}")
+
+    with _lock:
+        if name is None:
+            rows = _conn.execute(
+                "SELECT * FROM rollups WHERE level = ? ORDER BY name", (level,)
+            ).fetchall()
+        else:
+            rows = _conn.execute(
+                "SELECT * FROM rollups WHERE level = ? AND name = ?", (level, name)
+            ).fetchall()
+
+    return [_rollup_dict(r) for r in rows]
+
+
+def field_updated_at(farmer_id: str, field_id: str) -> float | None:
+    with _lock:
+        row = _conn.execute(
+            "SELECT updated_at FROM fields WHERE field_key = ?",
+            (f"{farmer_id}/{field_id}",),
+        ).fetchone()
+    return row[0] if row else None
+
+
+# -------------------------------------------------------
+# Bulk refresh job: python -m services.aggregates
+# -------------------------------------------------------
+def refresh_from_rtdb(max_age_hours: float = 24.0) -> int:
+    """Recompute carbon for fields whose rollup entry is missing or stale."""
+    from tools.firebase_tools import rtdb_get_keys, fetch_field_config_tool
+    from tools.carbon_tools import fetch_carbon_from_ndvi, parse_field_size_ha
+
+    cutoff = time.time() - max_age_hours * 3600
+    updated = 0
+
+    for farmer_id in rtdb_get_keys("Farmers"):
+        for field_id in rtdb_get_keys(f"Farmers/{farmer_id}/Fields"):
+            last = field_updated_at(farmer_id, field_id)
+            if last is not None and last >= cutoff:
+                continue
+
+            cfg = fetch_field_config_tool.invoke({
+                "farmer_id": farmer_id,
+                "field_id": field_id,
+            })
+            loc = cfg.get("location") or {}
+            if cfg.get("error") or loc.get("lat") is None or loc.get("lon") is None:
+                continue
+
+            carbon = fetch_carbon_from_ndvi.invoke({
+                "lat": loc["lat"],
+                "lon": loc["lon"],
+                "area_ha": parse_field_size_ha(cfg.get("fieldSize")),
+            })
+            upsert_field(cfg, carbon)
+            updated += 1
+
+    print(f"[aggregates] Refreshed {updated} fields")
+    return updated
+
+
+if __name__ == "__main__":
+    refresh_from_rtdb()
@@ -0,0 +1,153 @@
+# services/checkpoints.py
+
+import os
+import sqlite3
+import threading
+import time
+
+from langgraph.checkpoint.sqlite import SqliteSaver
+from config.settings import (
+    CHECKPOINT_DB_PATH,
+    CHECKPOINT_TTL_SECONDS,
+    RUN_COALESCE_STALE_SECONDS,
+)
+
+
+# -------------------------------------------------------
+# SQLite-backed LangGraph checkpointer
+# -------------------------------------------------------
+os.makedirs(os.path.dirname(CHECKPOINT_DB_PATH), exist_ok=True)
+
+checkpointer = SqliteSaver(
+    sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False)
+)
+
+# Separate connection for run bookkeeping (SqliteSaver guards its own)
+_conn = sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False)
+
+_lock = threading.Lock()
+_last_purge = 0.0
+
+with _lock:
+    _conn.execute(
+        "CREATE TABLE IF NOT EXISTS runs ("
+        " run_id TEXT PRIMARY KEY,"
+        " created_at REAL NOT NULL)"
+    )
+    # Field + status of runs started by /run_once (databases created before these existed)
+    _existing = {c[1] for c in _conn.execute("PRAGMA table_info(runs)")}
+    for _col in ("farmer_id", "field_id", "status"):
+        if _col not in _existing:
+            _conn.execute(f"ALTER TABLE runs ADD COLUMN {_col} TEXT")
+    _conn.execute("CREATE INDEX IF NOT EXISTS runs_field ON runs (farmer_id, field_id, status)")
+    _conn.commit()
+
+
+def run_config(run_id: str) -> dict:
+    """LangGraph config that keys checkpoints by run ID."""
+    return {"configurable": {"thread_id": run_id}}
+
+
+def register_run(run_id: str):
+    """Remember when a run started so its checkpoints can expire."""
+    with _lock:
+        _conn.execute(
+            "INSERT OR IGNORE INTO runs (run_id, created_at) VALUES (?, ?)",
+            (run_id, time.time()),
+        )
+        _conn.commit()
+
+
+# -------------------------------------------------------
+# Cross-process coalescing (one in-flight run per field)
+# -------------------------------------------------------
+def claim_field_run(
+    farmer_id: str,
+    field_id: str,
+    run_id: str,
+    stale_seconds: float = RUN_COALESCE_STALE_SECONDS,
+) -> str:
+    """
+    Register run_id as the field's in-flight run, unless some process
+    already has one running; returns the run ID that owns the field.
+    """
+    now = time.time()
+    with _lock:
+        _conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = _conn.execute(
+                "SELECT run_id FROM runs"
+                " WHERE farmer_id = ? AND field_id = ? AND status = 'running' AND created_at >= ?"
+                " ORDER BY created_at DESC LIMIT 1",
+                (farmer_id, field_id, now - stale_seconds),
+            ).fetchone()
+            if row is None:
+                _conn.execute(
+                    "INSERT INTO runs (run_id, created_at, farmer_id, field_id, status)"
+                    " VALUES (?, ?, ?, ?, 'running')",
+                    (run_id, now, farmer_id, field_id),
+                )
+            _conn.commit()
+        except Exception:
+            _conn.rollback()
+            raise
+    return row[0] if row else run_id
+
+
+def finish_run(run_id: str, status: str):
+    """Mark a claimed run "done" or "failed" so waiting processes continue."""
+    with _lock:
+        _conn.execute("UPDATE runs SET status = ? WHERE run_id = ?", (status, run_id))
+        _conn.commit()
+
+
+def wait_for_run(
+    run_id: str,
+    timeout: float = RUN_COALESCE_STALE_SECONDS,
+    poll_seconds: float = 0.5,
+) -> str | None:
+    """Block until a claimed run finishes; returns its status (None on timeout)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        with _lock:
+            row = _conn.execute("SELECT status FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None or row[0] != "running":
+            return row[0] if row else None
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll_seconds)
+
+
+# -------------------------------------------------------
+# Garbage collection
+# -------------------------------------------------------
+def purge_expired(ttl_seconds: int = CHECKPOINT_TTL_SECONDS) -> int:
+    """Delete checkpoints of runs older than ttl_seconds. Returns count."""
+    global _last_purge
+
+    cutoff = time.time() - ttl_seconds
+
+    with _lock:
+        rows = _conn.execute(
+            "SELECT run_id FROM runs WHERE created_at < ?", (cutoff,)
+        ).fetchall()
+
+    for (run_id,) in rows:
+        try:
+            checkpointer.delete_thread(run_id)
+        except Exception as e:
+            print(f"[checkpoints] Could not delete run {run_id}: {e}")
+            continue
+
+        with _lock:
+            _conn.execute("DELETE FROM runs WHERE run_id = ?", (run_id,))
+            _conn.commit()
+
+    _last_purge = time.time()
+    return len(rows)
+
+
+def maybe_purge(interval_seconds: int = 600):
+    """Run purge_expired at most once per interval (cheap to call per run)."""
+    if time.time() - _last_purge >= interval_seconds:
+        purge_expired()
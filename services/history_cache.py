@@ -0,0 +1,54 @@
+# services/history_cache.py
+
+import time
+import threading
+from collections import OrderedDict
+
+from config.settings import HISTORY_CACHE_FIELDS, HISTORY_CACHE_TTL_SECONDS
+
+_PAGES_PER_FIELD = 8
+
+# (farmer_id, field_id) -> OrderedDict[(limit, cursor)] = (stored_at, page)
+_fields: OrderedDict = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_page(farmer_id: str, field_id: str, limit: int, cursor: str | None):
+    key = (farmer_id, field_id)
+    with _lock:
+        pages = _fields.get(key)
+        if pages is None:
+            return None
+
+        entry = pages.get((limit, cursor))
+        if entry is None:
+            return None
+
+        stored_at, page = entry
+        if time.time() - stored_at > HISTORY_CACHE_TTL_SECONDS:
+            del pages[(limit, cursor)]
+            return None
+
+        _fields.move_to_end(key)
+        pages.move_to_end((limit, cursor))
+        return page
+
+
+def put_page(farmer_id: str, field_id: str, limit: int, cursor: str | None, page: dict):
+    key = (farmer_id, field_id)
+    with _lock:
+        pages = _fields.setdefault(key, OrderedDict())
+        pages[(limit, cursor)] = (time.time(), page)
+        pages.move_to_end((limit, cursor))
+        while len(pages) > _PAGES_PER_FIELD:
+            pages.popitem(last=False)
+
+        _fields.move_to_end(key)
+        while len(_fields) > HISTORY_CACHE_FIELDS:
+            _fields.popitem(last=False)
+
+
+def invalidate(farmer_id: str, field_id: str):
+    """Drop all cached pages of a field (called after a new consultation)."""
+    with _lock:
+        _fields.pop((farmer_id, field_id), None)
@@ -0,0 +1,290 @@
+# services/retrieval.py
+#
+# Nearest-neighbour lookup over past consultations. Each consultation is
+# embedded as "crop + problem list" (normalized, so inner product = cosine)
+# and stored with its solutions. SQLite holds rows + embeddings and is the
+# source of truth shared by all processes; the FAISS index is an in-memory
+# copy that catches up on rows added elsewhere; it is snapshotted to disk
+# periodically and at exit for fast startup.
+#
+#   python -m services.retrieval     # rebuild from RTDB AIConsultations
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+
+import numpy as np
+from config.settings import (
+    RETRIEVAL_DIR,
+    RETRIEVAL_MODEL,
+    RETRIEVAL_FEWSHOT_K,
+    RETRIEVAL_PERSIST_SECONDS,
+)
+
+_DB_PATH = os.path.join(RETRIEVAL_DIR, "consultations.sqlite")
+_INDEX_PATH = os.path.join(RETRIEVAL_DIR, "consultations.faiss")
+
+
+# -------------------------------------------------------
+# Storage
+# -------------------------------------------------------
+os.makedirs(RETRIEVAL_DIR, exist_ok=True)
+
+_conn = sqlite3.connect(_DB_PATH, check_same_thread=False)
+_conn.execute("PRAGMA journal_mode=WAL")
+_lock = threading.Lock()
+
+with _lock:
+    _conn.execute("""
+        CREATE TABLE IF NOT EXISTS consultations (
+            id         INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_key TEXT UNIQUE,
+            farmer_id  TEXT,
+            field_id   TEXT,
+            crop_type  TEXT,
+            problems   TEXT NOT NULL,
+            solutions  TEXT NOT NULL,
+            embedding  BLOB NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    # Bumped by a rebuild so other processes drop their in-memory index
+    _conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+    _conn.execute("INSERT OR IGNORE INTO meta VALUES ('generation', 0)")
+    _conn.commit()
+
+
+def consultation_text(crop_type: str | None, problems: list) -> str:
+    """What gets embedded: crop plus the problem list, order-independent."""
+    lines = sorted(str(p).strip() for p in problems if str(p).strip())
+    return f"crop: {(crop_type or 'unknown').lower()}\n" + "\n".join(lines)
+
+
+# -------------------------------------------------------
+# Embeddings + index (loaded lazily, heavy imports)
+# -------------------------------------------------------
+_model = None
+_model_lock = threading.Lock()
+_index = None
+_synced_id = 0
+_generation = None
+_dirty = False      # index has rows not yet snapshotted to disk
+
+
+def _embed(texts: list) -> np.ndarray:
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(RETRIEVAL_MODEL)
+
+    vectors = _model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _new_index(dim: int):
+    import faiss
+    return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+
+def _sync():
+    """Load the persisted index once, then add rows written since (any process)."""
+    global _index, _synced_id, _generation, _dirty
+    import faiss
+
+    generation = _conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()[0]
+    if generation != _generation:
+        _index, _synced_id, _generation = None, 0, generation
+
+    if _index is None and os.path.exists(_INDEX_PATH):
+        _index = faiss.read_index(_INDEX_PATH)
+        ids = faiss.vector_to_array(_index.id_map)
+        _synced_id = int(ids.max()) if ids.size else 0
+
+    rows = _conn.execute(
+        "SELECT id, embedding FROM consultations WHERE id > ? ORDER BY id",
+        (_synced_id,),
+    ).fetchall()
+    if not rows:
+        return
+
+    vectors = np.stack([np.frombuffer(blob, dtype=np.float32) for _, blob in rows])
+    if _index is None:
+        _index = _new_index(vectors.shape[1])
+
+    _index.add_with_ids(vectors, np.asarray([r[0] for r in rows], dtype=np.int64))
+    _synced_id = rows[-1][0]
+    _dirty = True
+
+
+def _persist():
+    global _dirty
+    import faiss
+
+    tmp = _INDEX_PATH + ".tmp"
+    faiss.write_index(_index, tmp)
+    os.replace(tmp, _INDEX_PATH)
+    _dirty = False
+
+
+def persist_if_dirty():
+    """Snapshot the in-memory index if rows were added since the last one."""
+    with _lock:
+        if _index is not None and _dirty:
+            _persist()
+
+
+def _persist_loop(interval_seconds: float):
+    while True:
+        time.sleep(interval_seconds)
+        try:
+            persist_if_dirty()
+        except Exception as e:
+            print(f"[retrieval] Index snapshot failed: {e}")
+
+
+def warm_up(persist_seconds: float = RETRIEVAL_PERSIST_SECONDS):
+    """Load the embedding model and index now (not on the first request)."""
+    _embed(["warm up"])
+    with _lock:
+        _sync()
+    threading.Thread(
+        target=_persist_loop, args=(persist_seconds,), name="retrieval-persist", daemon=True
+    ).start()
+
+
+atexit.register(persist_if_dirty)
+
+
+# -------------------------------------------------------
+# Public API
+# -------------------------------------------------------
+def add_consultation(
+    source_key: str,
+    farmer_id: str,
+    field_id: str,
+    crop_type: str | None,
+    problems: list,
+    solutions: list,
+) -> bool:
+    """Index one saved consultation. Returns False if skipped or already indexed."""
+    if not problems or not solutions:
+        return False
+
+    vector = _embed([consultation_text(crop_type, problems)])[0]
+
+    with _lock:
+        cur = _conn.execute(
+            "INSERT OR IGNORE INTO consultations"
+            " (source_key, farmer_id, field_id, crop_type, problems, solutions, embedding, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                source_key, farmer_id, field_id, crop_type,
+                json.dumps(problems, ensure_ascii=False),
+                json.dumps(solutions, ensure_ascii=False),
+                vector.tobytes(), time.time(),
+            ),
+        )
+        _conn.commit()
+        if cur.rowcount == 0:
+            return False
+
+        # Other processes catch up from SQLite; disk snapshot happens later
+        _sync()
+    return True
+
+
+def nearest(crop_type: str | None, problems: list, k: int = RETRIEVAL_FEWSHOT_K) -> list:
+    """Most similar past consultations: [{score, source_key, problems, solutions}, ...]."""
+    if not problems:
+        return []
+
+    query = _embed([consultation_text(crop_type, problems)])
+
+    with _lock:
+        _sync()
+        if _index is None or _index.ntotal == 0:
+            return []
+
+        scores, ids = _index.search(query, k)
+        hits = [(float(s), int(i)) for s, i in zip(scores[0], ids[0]) if i != -1]
+        if not hits:
+            return []
+
+        rows = {
+            row[0]: row[1:]
+            for row in _conn.execute(
+                "SELECT id, source_key, problems, solutions FROM consultations"
+                f" WHERE id IN ({', '.join('?' * len(hits))})",
+                [i for _, i in hits],
+            )
+        }
+
+    return [
+        {
+            "score": round(score, 4),
+            "source_key": rows[i][0],
+            "problems": json.loads(rows[i][1]),
+            "solutions": json.loads(rows[i][2]),
+        }
+        for score, i in hits
+        if i in rows
+    ]
+
+
+# -------------------------------------------------------
+# Rebuild from RTDB
+# -------------------------------------------------------
+def rebuild_from_rtdb(batch_size: int = 256) -> int:
+    """Re-embed every consultation in RTDB into a fresh store and index."""
+    from tools.firebase_tools import rtdb_get, rtdb_get_keys
+
+    records = []
+    for farmer_id in rtdb_get_keys("Farmers"):
+        for field_id in rtdb_get_keys(f"Farmers/{farmer_id}/Fields"):
+            field_path = f"Farmers/{farmer_id}/Fields/{field_id}"
+            crop_type = rtdb_get(f"{field_path}/cropType")
+            for key, c in (rtdb_get(f"{field_path}/AIConsultations") or {}).items():
+                c = c or {}
+                if c.get("problems") and c.get("solutions") and not c.get("reused_from"):
+                    records.append((key, farmer_id, field_id, crop_type, c["problems"], c["solutions"]))
+
+    now = time.time()
+    rows = []
+    for i in range(0, len(records), batch_size):
+        chunk = records[i:i + batch_size]
+        vectors = _embed([consultation_text(r[3], r[4]) for r in chunk])
+        for r, v in zip(chunk, vectors):
+            rows.append((
+                r[0], r[1], r[2], r[3],
+                json.dumps(r[4], ensure_ascii=False),
+                json.dumps(r[5], ensure_ascii=False),
+                v.tobytes(), now,
+            ))
+
+    with _lock:
+        _conn.execute("DELETE FROM consultations")
+        _conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        _conn.executemany(
+            "INSERT OR IGNORE INTO consultations"
+            " (source_key, farmer_id, field_id, crop_type, problems, solutions, embedding, created_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        _conn.commit()
+
+        if os.path.exists(_INDEX_PATH):
+            os.remove(_INDEX_PATH)
+        _sync()
+        if _index is not None:
+            _persist()
+
+    return len(rows)
+
+
+if __name__ == "__main__":
+    n = rebuild_from_rtdb()
+    print(f"[retrieval] Indexed {n} consultations")
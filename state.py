@@ -7,10 +7,16 @@ class AgentState(BaseModel):
 
     field_config: dict | None = None
     iot_data: dict | None = None
+    iot_features: dict | None = None
     satellite_data: dict | None = None
     flood_risk: dict | None = None
     carbon_data: dict | None = None
 
     problems: List[str] = []
     solutions: List[str] = []
+    reused_from: str | None = None  # consultation key whose solutions were reused
+
+    # Early-exit / skip bookkeeping (see graph.py)
+    error: dict | None = None
+    skipped: List[dict] = []
 
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep runtime stores (SQLite caches, indexes) out of the repo's data/
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="field-guardian-tests-"))
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("joblib")
+pytest.importorskip("sklearn")
+
+from config.settings import FLOOD_MODEL_PATH, FLOOD_NATIVE_PATH
+from tools.flood_native import NativeFloodModel, export_model, file_sha256, verify_parity
+
+pytestmark = pytest.mark.filterwarnings("ignore::UserWarning")
+
+needs_models = pytest.mark.skipif(
+    not (os.path.exists(FLOOD_MODEL_PATH) and os.path.exists(FLOOD_NATIVE_PATH)),
+    reason="flood model files not present",
+)
+
+
+@needs_models
+def test_shipped_export_matches_pickle():
+    verify_parity()
+
+
+@needs_models
+def test_shipped_export_is_from_current_pickle():
+    assert NativeFloodModel(FLOOD_NATIVE_PATH).source_sha256 == file_sha256(FLOOD_MODEL_PATH)
+
+
+def test_forest_export_round_trip(tmp_path):
+    from sklearn.ensemble import RandomForestRegressor
+
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.uniform(10, 35, size=(300, 3)), rng.integers(1, 13, size=300)])
+    y = X[:, :3].sum(axis=1) * 5 + rng.normal(0, 3, size=300)
+    model = RandomForestRegressor(n_estimators=5, max_depth=6, random_state=0).fit(X, y)
+
+    path = str(tmp_path / "forest.npz")
+    export_model(model, path, source_sha256="abc")
+    native = NativeFloodModel(path)
+
+    np.testing.assert_allclose(native.predict(X), model.predict(X), rtol=1e-9, atol=1e-6)
+    assert native.source_sha256 == "abc"
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("langchain_groq")
+
+from llm_client import LLMRouter, score_complexity
+from state import AgentState
+
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+
+
+class StubModel:
+    def __init__(self, *replies, fail=False):
+        self.replies = list(replies)
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return Reply(self.replies.pop(0))
+
+
+def parse_solutions(text):
+    try:
+        parsed = json.loads(text or "")
+    except ValueError:
+        return None
+    return parsed.get("solutions") if isinstance(parsed, dict) else None
+
+
+GOOD = json.dumps({"solutions": ["Irrigate in the early morning."]})
+
+
+def test_simple_case_stays_on_small_model():
+    small, large = StubModel(GOOD), StubModel(GOOD)
+    router = LLMRouter(small, large, threshold=3)
+
+    assert router.invoke([], complexity=0, parse=parse_solutions) == ["Irrigate in the early morning."]
+    assert (small.calls, large.calls) == (1, 0)
+    assert router.stats()["escalations"] == 0
+
+
+def test_malformed_small_output_escalates():
+    small, large = StubModel("Sure! Here are some ideas: ..."), StubModel(GOOD)
+    router = LLMRouter(small, large, threshold=3)
+
+    assert router.invoke([], complexity=0, parse=parse_solutions, label="t") == ["Irrigate in the early morning."]
+    assert (small.calls, large.calls) == (1, 1)
+
+    stats = router.stats()
+    assert stats["escalations"] == 1
+    assert stats["recent"][-1]["escalated"] is True
+
+
+def test_small_model_api_error_is_raised_not_escalated():
+    small, large = StubModel(fail=True), StubModel(GOOD)
+    router = LLMRouter(small, large, threshold=3)
+
+    with pytest.raises(RuntimeError):
+        router.invoke([], complexity=0, parse=parse_solutions)
+
+    assert large.calls == 0
+    stats = router.stats()
+    assert stats["models"]["small"]["errors"] == 1
+    assert stats["escalations"] == 0
+
+
+def test_complex_case_goes_straight_to_large_model():
+    small, large = StubModel(GOOD), StubModel("not json")
+    router = LLMRouter(small, large, threshold=3)
+
+    assert router.invoke([], complexity=5, parse=parse_solutions) is None
+    assert (small.calls, large.calls) == (0, 1)
+    assert router.stats()["escalations"] == 0
+
+
+def test_score_complexity_counts_conflicting_signals():
+    calm = AgentState(flood_risk={"flood_risk": "low"})
+    assert score_complexity(calm) == 0
+
+    conflicted = AgentState(
+        flood_risk={"flood_risk": "high"},
+        iot_features={"soilMoisture": {"latest": 12.0, "anomaly": True}},
+    )
+    assert score_complexity(conflicted) == 3 + 1 + 2
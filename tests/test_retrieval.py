@@ -0,0 +1,94 @@
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("dotenv")
+pytest.importorskip("faiss")
+
+from services import retrieval
+
+
+class HashEncoder:
+    """Deterministic bag-of-words stand-in for the sentence-transformers model."""
+
+    def encode(self, texts, normalize_embeddings=True, convert_to_numpy=True):
+        out = np.zeros((len(texts), 64), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                out[i, zlib.crc32(word.encode()) % 64] += 1.0
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(retrieval, "_model", HashEncoder())
+    with retrieval._lock:
+        retrieval._conn.execute("DELETE FROM consultations")
+        retrieval._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'generation'")
+        retrieval._conn.commit()
+    _forget_index(delete_file=True)
+    yield retrieval
+    _forget_index(delete_file=True)
+
+
+def _forget_index(delete_file=False):
+    """Drop the in-memory index, as in a freshly started process."""
+    retrieval._index, retrieval._synced_id, retrieval._generation = None, 0, None
+    retrieval._dirty = False
+    if delete_file and retrieval.os.path.exists(retrieval._INDEX_PATH):
+        retrieval.os.remove(retrieval._INDEX_PATH)
+
+
+def _add(store, key, crop, problems):
+    return store.add_consultation(key, "farmer_1", "field_1", crop, problems, [f"fix for {key}"])
+
+
+def test_saved_consultation_is_found(store):
+    assert _add(store, "k1", "rice", ["Soil moisture is low", "Nitrogen deficiency"])
+    assert _add(store, "k2", "jute", ["Flood risk is high"])
+    assert not _add(store, "k1", "rice", ["Soil moisture is low"])   # already indexed
+
+    hits = store.nearest("rice", ["Nitrogen deficiency", "Soil moisture is low"], k=1)
+    assert [h["source_key"] for h in hits] == ["k1"]
+    assert hits[0]["score"] == pytest.approx(1.0, abs=1e-4)
+    assert hits[0]["solutions"] == ["fix for k1"]
+
+
+def test_reused_answer_is_not_reindexed(store, monkeypatch):
+    pytest.importorskip("firebase_admin")
+    from tools import firebase_tools
+
+    monkeypatch.setattr(firebase_tools, "rtdb_push", lambda path, payload: "k_reused")
+    _add(store, "k1", "rice", ["Soil moisture is low"])
+
+    firebase_tools.save_agent_output_tool.invoke({
+        "farmer_id": "farmer_2",
+        "field_id": "field_9",
+        "problems": ["Soil moisture is low"],
+        "solutions": ["fix for k1"],
+        "crop_type": "rice",
+        "reused_from": "k1",
+    })
+
+    keys = [r[0] for r in store._conn.execute("SELECT source_key FROM consultations")]
+    assert keys == ["k1"]
+
+
+def test_snapshot_and_warm_up_return_same_neighbours(store):
+    _add(store, "k1", "rice", ["Soil moisture is low", "Nitrogen deficiency"])
+    _add(store, "k2", "rice", ["Soil moisture is low", "Leaf blight"])
+    _add(store, "k3", "jute", ["Flood risk is high"])
+    query = ("rice", ["Soil moisture is low", "Nitrogen deficiency"])
+    before = store.nearest(*query, k=3)
+
+    store.persist_if_dirty()
+    assert store.os.path.exists(store._INDEX_PATH)
+    assert not store._dirty
+
+    _forget_index()
+    store.warm_up(persist_seconds=3600)
+    assert store._index.ntotal == 3
+    assert not store._dirty          # loaded from the snapshot, nothing re-added
+
+    assert store.nearest(*query, k=3) == before
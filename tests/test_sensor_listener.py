@@ -0,0 +1,178 @@
+import pytest
+
+pytest.importorskip("dotenv")
+
+from services.admission import Overloaded
+from workers.sensor_listener import SensorEventProcessor, parse_reading_event, trigger_reason
+
+
+class Event:
+    def __init__(self, path, data):
+        self.path = path
+        self.data = data
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def _processor(clock, runs, debounce=30.0, min_interval=0.0):
+    return SensorEventProcessor(
+        run_fn=lambda farmer_id, field_id: runs.append((farmer_id, field_id)),
+        debounce_seconds=debounce,
+        min_interval_seconds=min_interval,
+        clock=clock,
+        executor=InlineExecutor(),
+    )
+
+
+def _reading(ts, moisture):
+    return {"timestamp": ts, "soilMoisture": moisture}
+
+
+def test_parse_reading_event():
+    snapshot = {"a": _reading(1, 50), "b": _reading(2, 51)}
+    assert len(parse_reading_event("/", snapshot)) == 2
+    assert parse_reading_event("/c", _reading(3, 52)) == [_reading(3, 52)]
+    assert parse_reading_event("/c", None) == []
+    assert parse_reading_event("/c/soilMoisture", 3) == []
+
+
+def test_trigger_reason_crossing_and_change():
+    assert trigger_reason({"soilMoisture": 15}, None) == "soilMoisture_low"
+    assert trigger_reason({"soilMoisture": 50}, None) is None
+    assert trigger_reason({"soilMoisture": 50}, {"soilMoisture": 70}) == "soilMoisture_changed"
+    assert trigger_reason({"soilMoisture": 45}, {"soilMoisture": 15}) == "soilMoisture_recovered"
+
+
+def test_initial_snapshot_sets_baseline_without_running():
+    clock, runs = FakeClock(), []
+    p = _processor(clock, runs)
+
+    p.handle_event("f", "x", Event("/", {"a": _reading(1000, 70)}))
+    clock.now += 60
+    assert p.poll() == []
+
+    # Large in-band change against the snapshot baseline
+    p.handle_event("f", "x", Event("/b", _reading(1060, 50)))
+    clock.now += 60
+    assert p.poll() == [(("f", "x"), "soilMoisture_changed")]
+    assert runs == [("f", "x")]
+
+
+def test_in_band_drift_runs_without_prior_crossing():
+    clock, runs = FakeClock(), []
+    p = _processor(clock, runs)
+    p.handle_event("f", "x", Event("/", None))   # empty field at connect
+
+    reasons = []
+    for i, moisture in enumerate([70, 50, 30, 75, 22]):
+        p.handle_event("f", "x", Event(f"/r{i}", _reading(1000 + i, moisture)))
+        clock.now += 60
+        reasons += [reason for _, reason in p.poll()]
+
+    assert reasons == ["soilMoisture_changed"] * 4
+    assert len(runs) == 4
+
+
+def test_burst_is_debounced_to_latest_reading():
+    clock, runs = FakeClock(), []
+    p = _processor(clock, runs)
+    p.handle_event("f", "x", Event("/", {"a": _reading(1000, 50)}))
+
+    # Epoch timestamps: "999" sorts after "1000" as text, not as time
+    p.handle_event("f", "x", Event("/", {"b": _reading(1000, 15), "c": _reading(999, 50)}))
+    clock.now += 10
+    assert p.poll() == []          # still inside the debounce window
+
+    clock.now += 30
+    assert p.poll() == [(("f", "x"), "soilMoisture_low")]
+    assert runs == [("f", "x")]
+
+
+def test_changes_are_rate_limited_but_crossings_are_not():
+    clock, runs = FakeClock(), []
+    p = _processor(clock, runs, debounce=0.0, min_interval=1800.0)
+    p.handle_event("f", "x", Event("/", {"a": _reading(1, 70)}))
+
+    p.handle_event("f", "x", Event("/b", _reading(2, 50)))
+    assert p.poll() == [(("f", "x"), "soilMoisture_changed")]
+
+    p.handle_event("f", "x", Event("/c", _reading(3, 35)))
+    assert p.poll() == []          # within min interval
+
+    p.handle_event("f", "x", Event("/d", _reading(4, 10)))
+    assert p.poll() == [(("f", "x"), "soilMoisture_low")]
+
+
+def test_farmers_stream_is_dispatched_by_path():
+    clock, runs = FakeClock(), []
+    p = _processor(clock, runs, debounce=0.0)
+
+    # Initial snapshot of the whole tree: baselines only
+    p.dispatch(Event("/", {
+        "f": {"Fields": {
+            "x": {"IoT": {"SensorReadings": {"a": _reading(1, 50)}}, "cropType": "rice"},
+            "y": {"AIConsultations": {"k": {"problems": []}}},
+        }},
+    }))
+    assert p.poll() == []
+
+    # Unrelated writes under a farmer are ignored
+    p.dispatch(Event("/f/Fields/x/AIConsultations/k2", {"problems": ["dry"]}))
+    assert p.poll() == []
+
+    p.dispatch(Event("/f/Fields/x/IoT/SensorReadings/b", _reading(2, 10)))
+    assert p.poll() == [(("f", "x"), "soilMoisture_low")]
+
+    # New field added later with readings: baseline, then live readings
+    p.dispatch(Event("/g/Fields/z", {"IoT": {"SensorReadings": {"a": _reading(1, 50)}}}))
+    p.dispatch(Event("/g/Fields/z/IoT/SensorReadings/b", _reading(2, 90)))
+    assert p.poll() == [(("g", "z"), "soilMoisture_high")]
+    assert runs == [("f", "x"), ("g", "z")]
+
+
+def test_deleted_field_is_forgotten():
+    clock, runs = FakeClock(), []
+    p = _processor(clock, runs)
+
+    p.dispatch(Event("/f/Fields/x/IoT/SensorReadings/a", _reading(1, 10)))
+    p.dispatch(Event("/f/Fields/x", None))
+    clock.now += 60
+    assert p.poll() == []
+    assert runs == []
+
+
+def test_overloaded_run_is_requeued():
+    clock, runs, attempts = FakeClock(), [], []
+
+    def run_fn(farmer_id, field_id):
+        attempts.append((farmer_id, field_id))
+        if len(attempts) == 1:
+            raise Overloaded("interactive", "queue_full", retry_after=5)
+        runs.append((farmer_id, field_id))
+
+    p = SensorEventProcessor(
+        run_fn=run_fn, debounce_seconds=0.0, min_interval_seconds=0.0,
+        clock=clock, executor=InlineExecutor(),
+    )
+    p.handle_event("f", "x", Event("/", {"a": _reading(1, 50)}))
+    p.handle_event("f", "x", Event("/b", _reading(2, 10)))
+
+    assert p.poll() == [(("f", "x"), "soilMoisture_low")]
+    assert runs == []
+
+    clock.now += 1
+    assert p.poll() == []          # waits for Retry-After
+    clock.now += 5
+    assert p.poll() == [(("f", "x"), "soilMoisture_low")]
+    assert runs == [("f", "x")]
@@ -3,7 +3,8 @@
 import ee
 from datetime import datetime
 from langchain_core.tools import tool
-from config.settings import DEMO_MODE
+from config.settings import DEMO_MODE, CACHE_TTL_CARBON
+from tools.shared_cache import get_or_compute, make_key
 
 # -----------------------------
 # Initialize Earth Engine safely
@@ -46,16 +47,70 @@ def _compute_ndvi(lat: float, lon: float):
         return None
 
 
+# -----------------------------
+# Helper: Field size → hectares
+# -----------------------------
+# Hectares per unit (Bangladesh land units included)
+_AREA_UNITS_HA = {
+    "decimal": 0.00404686,
+    "decimals": 0.00404686,
+    "shotangsho": 0.00404686,
+    "katha": 0.00668903,
+    "kathas": 0.00668903,
+    "bigha": 0.13378,
+    "bighas": 0.13378,
+    "acre": 0.404686,
+    "acres": 0.404686,
+    "ha": 1.0,
+    "hectare": 1.0,
+    "hectares": 1.0,
+    "m2": 0.0001,
+    "sqm": 0.0001,
+    "sqft": 0.0000092903,
+}
+
+
+def parse_field_size_ha(field_size) -> float | None:
+    """
+    Convert RTDB fieldSize (e.g. "30 decimals", 0.5) to hectares.
+    Returns None if the size is missing or not understood.
+    """
+    if field_size is None:
+        return None
+
+    if isinstance(field_size, (int, float)):
+        return float(field_size) if field_size > 0 else None
+
+    parts = str(field_size).strip().lower().replace(",", "").split()
+    if not parts:
+        return None
+
+    try:
+        value = float(parts[0])
+    except ValueError:
+        return None
+
+    unit = parts[1] if len(parts) > 1 else "ha"
+    factor = _AREA_UNITS_HA.get(unit)
+
+    if factor is None or value <= 0:
+        return None
+
+    return value * factor
+
+
 # -----------------------------
 # Method 1 — Viewport Carbon Method
 # -----------------------------
-def _carbon_from_viewport(ndvi_value: float, area_ha: float = 1.0):
+def _carbon_from_viewport(ndvi_value: float, area_ha: float | None = 1.0):
     if ndvi_value is None:
         return None
 
     carbon_per_ha = float(ndvi_value) * 2
-    total_carbon = carbon_per_ha * area_ha
-    revenue = total_carbon * 15
+
+    # Unknown field size: per-ha figures only, no made-up totals
+    total_carbon = carbon_per_ha * area_ha if area_ha is not None else None
+    revenue = total_carbon * 15 if total_carbon is not None else None
 
     return {
         "area_ha": area_ha,
@@ -97,7 +152,7 @@ def _carbon_from_point(ndvi_value: float):
 # LangChain Tool — used by LangGraph
 # -----------------------------
 @tool
-def fetch_carbon_from_ndvi(lat: float, lon: float, area_ha: float = 1.0):
+def fetch_carbon_from_ndvi(lat: float, lon: float, area_ha: float | None = 1.0):
     """
     Compute NDVI → Carbon Sequestration using simplified models.
     Safe for LangGraph + RTDB architecture.
@@ -114,12 +169,18 @@ def fetch_carbon_from_ndvi(lat: float, lon: float, area_ha: float = 1.0):
             "note": "DEMO_MODE enabled",
         }
 
-    ndvi_number = _compute_ndvi(lat, lon)
-
-    try:
-        ndvi_value = ee.Number(ndvi_number).getInfo()
-    except:
-        ndvi_value = None
+    def _ndvi_value():
+        try:
+            return ee.Number(_compute_ndvi(lat, lon)).getInfo()
+        except:
+            return None
+
+    # NDVI is the only expensive part; area-dependent math stays per call
+    ndvi_value = get_or_compute(
+        make_key("ndvi", round(lat, 4), round(lon, 4)),
+        CACHE_TTL_CARBON,
+        _ndvi_value,
+    )
 
     viewport = _carbon_from_viewport(ndvi_value, area_ha)
     point = _carbon_from_point(ndvi_value)
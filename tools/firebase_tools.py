@@ -5,6 +5,8 @@ from firebase_admin import credentials, db
 from datetime import datetime
 from langchain_core.tools import tool
 from config.settings import FIREBASE_CRED_PATH, DEMO_MODE
+from tools.iot_analytics import ingest_readings
+from services import history_cache, retrieval
 
 
 # -------------------------------------------------------------------
@@ -36,11 +38,29 @@ def rtdb_get(path):
     return ref.get()
 
 
+def rtdb_get_shallow(path):
+    """Primitive children with their values; nested children as True."""
+    ref = db.reference(path)
+    return ref.get(shallow=True)
+
+
+def rtdb_get_keys(path):
+    """Child keys only (shallow read, no nested data downloaded)."""
+    data = rtdb_get_shallow(path)
+    return list(data.keys()) if isinstance(data, dict) else []
+
+
 def rtdb_set(path, data):
     ref = db.reference(path)
     ref.set(data)
 
 
+def rtdb_update(path, data):
+    """Multi-path update: keys are paths relative to `path` (None deletes)."""
+    ref = db.reference(path)
+    ref.update(data)
+
+
 def rtdb_push(path, data):
     ref = db.reference(path)
     return ref.push(data).key
@@ -66,8 +86,9 @@ def fetch_field_config_tool(farmer_id: str, field_id: str):
 
     print("🔍 Fetching from RTDB:", farmer_id, field_id)
 
+    # Shallow: profile values only, not every field's readings/history
     farmer_path = f"Farmers/{farmer_id}"
-    farmer = rtdb_get(farmer_path)
+    farmer = rtdb_get_shallow(farmer_path)
 
     if farmer is None:
         return {
@@ -133,6 +154,9 @@ def fetch_iot_data_tool(farmer_id: str, field_id: str):
         reverse=True,
     )
 
+    # Feed the per-field ring buffer used for trend / fault features
+    ingest_readings(f"{farmer_id}/{field_id}", sorted_readings)
+
     return {
         "has_data": True,
         "latest": sorted_readings[0],
@@ -152,7 +176,9 @@ def save_agent_output_tool(
     field_id: str,
     problems,
     solutions,
-    carbon_data=None
+    carbon_data=None,
+    crop_type: str | None = None,
+    reused_from: str | None = None
 ):
     """Save AI consultation into Firebase RTDB with carbon_data included."""
 
@@ -173,13 +199,64 @@ def save_agent_output_tool(
         "problems": problems,
         "solutions": solutions,
         "carbon_data": carbon_data or None,
+        "reused_from": reused_from,   # source consultation when solutions were reused
     }
 
     # push() auto-generates a unique key
-    rtdb_push(path, payload)
+    key = rtdb_push(path, payload)
+
+    # Cached history pages of this field are now stale
+    history_cache.invalidate(farmer_id, field_id)
+
+    # Make new answers available for reuse (reused ones are already indexed)
+    if not reused_from:
+        try:
+            retrieval.add_consultation(key, farmer_id, field_id, crop_type, problems, solutions)
+        except Exception as e:
+            print(f"[firebase_tools] Retrieval index update failed: {e}")
 
     return {
         "status": "saved",
         "farmer_id": farmer_id,
         "field_id": field_id,
     }
+
+
+# -------------------------------------------------------------------
+# 4. Consultation history (key-ordered, newest first, cursor paging)
+# -------------------------------------------------------------------
+def fetch_consultations_page(farmer_id: str, field_id: str, limit: int, cursor: str | None = None):
+    """
+    One page of AIConsultations, newest first. `cursor` is the push key of
+    the last item of the previous page. Push keys sort chronologically, so
+    only `limit + 1` children are downloaded regardless of history size.
+    """
+    cached = history_cache.get_page(farmer_id, field_id, limit, cursor)
+    if cached is not None:
+        return cached
+
+    path = f"Farmers/{farmer_id}/Fields/{field_id}/AIConsultations"
+    query = db.reference(path).order_by_key()
+
+    if cursor:
+        # end_at is inclusive: fetch one extra to drop the cursor itself
+        query = query.end_at(cursor).limit_to_last(limit + 2)
+    else:
+        query = query.limit_to_last(limit + 1)
+
+    data = query.get() or {}
+
+    items = [
+        {"id": key, "field_id": field_id, **(value or {})}
+        for key, value in data.items()
+        if key != cursor
+    ]
+    items.sort(key=lambda x: x["id"], reverse=True)
+
+    page = {
+        "items": items[:limit],
+        "next_cursor": items[limit - 1]["id"] if len(items) > limit else None,
+    }
+
+    history_cache.put_page(farmer_id, field_id, limit, cursor, page)
+    return page
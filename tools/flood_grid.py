@@ -0,0 +1,174 @@
+# tools/flood_grid.py
+
+import os
+from datetime import datetime
+
+import numpy as np
+import requests
+from config.settings import FLOOD_GRID_DIR, FLOOD_GRID_BOUNDS, FLOOD_GRID_STEP
+
+# Channels stored per cell
+CH_TEMP_1, CH_TEMP_2, CH_TEMP_3, CH_RAINFALL = range(4)
+
+_LAT0 = FLOOD_GRID_BOUNDS["lat_min"]
+_LON0 = FLOOD_GRID_BOUNDS["lon_min"]
+_N_LAT = int(round((FLOOD_GRID_BOUNDS["lat_max"] - _LAT0) / FLOOD_GRID_STEP)) + 1
+_N_LON = int(round((FLOOD_GRID_BOUNDS["lon_max"] - _LON0) / FLOOD_GRID_STEP)) + 1
+
+
+# --------------------------------------------------
+# Paths
+# --------------------------------------------------
+def grid_path(year: int, month: int) -> str:
+    return os.path.join(FLOOD_GRID_DIR, f"flood_grid_{year}_{month:02d}.npy")
+
+
+def cell_centers():
+    lats = _LAT0 + np.arange(_N_LAT) * FLOOD_GRID_STEP
+    lons = _LON0 + np.arange(_N_LON) * FLOOD_GRID_STEP
+    return lats, lons
+
+
+# --------------------------------------------------
+# O(1) lookup (memory-mapped, shared via page cache)
+# --------------------------------------------------
+_grid = None
+_grid_key = None
+
+
+def _current_grid():
+    global _grid, _grid_key
+
+    now = datetime.utcnow()
+    key = (now.year, now.month)
+
+    # A missing grid is not cached: the monthly build may land mid-month
+    if _grid_key != key or _grid is None:
+        path = grid_path(*key)
+        _grid = np.load(path, mmap_mode="r") if os.path.exists(path) else None
+        _grid_key = key
+
+    return _grid
+
+
+def lookup_flood_grid(lat: float, lon: float):
+    """Nearest precomputed cell for (lat, lon), or None if unavailable."""
+    if lat is None or lon is None:
+        return None
+
+    grid = _current_grid()
+    if grid is None:
+        return None
+
+    i = int(round((lat - _LAT0) / FLOOD_GRID_STEP))
+    j = int(round((lon - _LON0) / FLOOD_GRID_STEP))
+
+    if not (0 <= i < _N_LAT and 0 <= j < _N_LON):
+        return None
+
+    cell = np.asarray(grid[i, j], dtype=float)
+    if np.isnan(cell).any():
+        return None
+
+    return {
+        "cell_lat": round(_LAT0 + i * FLOOD_GRID_STEP, 4),
+        "cell_lon": round(_LON0 + j * FLOOD_GRID_STEP, 4),
+        "temps": [cell[CH_TEMP_1], cell[CH_TEMP_2], cell[CH_TEMP_3]],
+        "predicted_rainfall_mm": cell[CH_RAINFALL],
+    }
+
+
+# --------------------------------------------------
+# Build job: python -m tools.flood_grid
+# --------------------------------------------------
+def _fetch_monthly_means_batch(lats, lons, months):
+    """
+    Monthly mean temperatures for many points in one Open-Meteo call.
+    Returns array (n_points, len(months)) with NaN where missing.
+    """
+    from tools.flood_tools import _month_date_range
+
+    start, _ = _month_date_range(*months[0])
+    _, end = _month_date_range(*months[-1])
+
+    resp = requests.get(
+        "https://archive-api.open-meteo.com/v1/archive",
+        params={
+            "latitude": ",".join(f"{v:.4f}" for v in lats),
+            "longitude": ",".join(f"{v:.4f}" for v in lons),
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "daily": "temperature_2m_mean",
+            "timezone": "UTC",
+        },
+        timeout=60,
+    )
+    out = np.full((len(lats), len(months)), np.nan)
+
+    if resp.status_code != 200:
+        print(f"[flood_grid] Open-Meteo error {resp.status_code}: {resp.text}")
+        return out
+
+    data = resp.json()
+    if isinstance(data, dict):
+        data = [data]
+
+    for p, loc in enumerate(data):
+        daily = loc.get("daily", {})
+        days = np.array(daily.get("time", []), dtype="datetime64[D]")
+        temps = np.array(
+            [np.nan if t is None else t for t in daily.get("temperature_2m_mean", [])],
+            dtype=float,
+        )
+        if days.size == 0:
+            continue
+
+        for k, (y, m) in enumerate(months):
+            month_mask = days.astype("datetime64[M]") == np.datetime64(f"{y}-{m:02d}")
+            vals = temps[month_mask]
+            if vals.size and not np.isnan(vals).all():
+                out[p, k] = np.nanmean(vals)
+
+    return out
+
+
+def build_flood_grid(batch_size: int = 50) -> str:
+    """Evaluate flood_model over the whole grid for the current month."""
+    from tools.flood_tools import flood_model, _last_n_full_months
+
+    if flood_model is None:
+        raise RuntimeError("Flood model not loaded; cannot build grid.")
+
+    now = datetime.utcnow()
+    months = _last_n_full_months(3)
+
+    lats, lons = cell_centers()
+    lat_mesh, lon_mesh = np.meshgrid(lats, lons, indexing="ij")
+    flat_lat = lat_mesh.ravel()
+    flat_lon = lon_mesh.ravel()
+
+    temps = np.full((flat_lat.size, 3), np.nan)
+    for start in range(0, flat_lat.size, batch_size):
+        sl = slice(start, start + batch_size)
+        temps[sl] = _fetch_monthly_means_batch(flat_lat[sl], flat_lon[sl], months)
+
+    grid = np.full((flat_lat.size, 4), np.nan, dtype=np.float32)
+    grid[:, :3] = temps
+
+    ok = ~np.isnan(temps).any(axis=1)
+    if ok.any():
+        features = np.column_stack([temps[ok], np.full(ok.sum(), now.month)])
+        grid[ok, CH_RAINFALL] = flood_model.predict(features)
+
+    os.makedirs(FLOOD_GRID_DIR, exist_ok=True)
+    path = grid_path(now.year, now.month)
+    tmp = path + ".tmp.npy"
+    np.save(tmp, grid.reshape(_N_LAT, _N_LON, 4))
+    os.replace(tmp, path)
+
+    print(f"[flood_grid] Wrote {path} ({ok.sum()}/{ok.size} cells)")
+    return path
+
+
+if __name__ == "__main__":
+    build_flood_grid()
@@ -0,0 +1,201 @@
+# tools/flood_native.py
+#
+# Array-based flood model: the trained scikit-learn estimator is exported
+# once to an uncompressed .npz, and predictions are plain NumPy math on
+# memory-mapped arrays (no sklearn import, no unpickling at startup).
+#
+#   python -m tools.flood_native     # export models/flood_model.pkl + parity check
+
+import hashlib
+import zipfile
+
+import numpy as np
+from numpy.lib import format as npy_format
+from config.settings import FLOOD_MODEL_PATH, FLOOD_NATIVE_PATH
+
+KIND_LINEAR = 0
+KIND_TREES = 1
+
+
+# --------------------------------------------------
+# Export (needs scikit-learn; offline only)
+# --------------------------------------------------
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _tree_arrays(estimators):
+    """Concatenate sklearn trees into flat node arrays with per-tree roots."""
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+
+    for est in estimators:
+        t = est.tree_
+        n = t.node_count
+        is_leaf = t.children_left == -1
+
+        left.append(np.where(is_leaf, -1, t.children_left + offset))
+        right.append(np.where(is_leaf, -1, t.children_right + offset))
+        feature.append(t.feature)
+        threshold.append(t.threshold)
+        value.append(t.value[:, 0, 0])
+        roots.append(offset)
+        offset += n
+
+    return {
+        "children_left": np.concatenate(left).astype(np.int32),
+        "children_right": np.concatenate(right).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+    }
+
+
+def export_model(model, path: str = FLOOD_NATIVE_PATH, source_sha256: str = ""):
+    """
+    Write a fitted regressor as arrays. Supports linear models and tree ensembles.
+    `source_sha256` identifies the pickle it came from (stale-export check).
+    """
+    if hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        arrays = {
+            "kind": np.asarray(KIND_LINEAR),
+            "coef": np.ravel(model.coef_).astype(np.float64),
+            "intercept": np.asarray(float(np.ravel(model.intercept_)[0])),
+        }
+    elif hasattr(model, "tree_"):
+        arrays = {"kind": np.asarray(KIND_TREES), **_tree_arrays([model])}
+    elif hasattr(model, "estimators_") and all(hasattr(e, "tree_") for e in model.estimators_):
+        # RandomForest / ExtraTrees: mean of trees
+        arrays = {"kind": np.asarray(KIND_TREES), **_tree_arrays(model.estimators_)}
+    else:
+        raise TypeError(f"Unsupported model type for native export: {type(model).__name__}")
+
+    arrays["source_sha256"] = np.asarray(source_sha256)
+
+    # Uncompressed so members can be memory-mapped in place
+    np.savez(path, **arrays)
+    return path
+
+
+# --------------------------------------------------
+# Memory-mapped .npz reader
+# --------------------------------------------------
+def _mmap_npz(path: str) -> dict:
+    """Map each (uncompressed) .npz member directly from the file."""
+    arrays = {}
+
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as raw:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{info.filename} is compressed; re-export with np.savez")
+
+            # Skip the local file header to the .npy payload
+            raw.seek(info.header_offset)
+            header = raw.read(30)
+            name_len = int.from_bytes(header[26:28], "little")
+            extra_len = int.from_bytes(header[28:30], "little")
+            npy_start = info.header_offset + 30 + name_len + extra_len
+
+            raw.seek(npy_start)
+            version = npy_format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran, dtype = npy_format.read_array_header_1_0(raw)
+            else:
+                shape, fortran, dtype = npy_format.read_array_header_2_0(raw)
+            data_start = raw.tell()
+
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if shape == ():
+                raw.seek(data_start)
+                arrays[name] = np.frombuffer(raw.read(dtype.itemsize), dtype=dtype)[0]
+            else:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode="r", offset=data_start,
+                    shape=shape, order="F" if fortran else "C",
+                )
+
+    return arrays
+
+
+# --------------------------------------------------
+# Predictor
+# --------------------------------------------------
+class NativeFloodModel:
+    """Drop-in for the sklearn estimator's `predict` (2-D input, 1-D output)."""
+
+    def __init__(self, path: str = FLOOD_NATIVE_PATH):
+        self.arrays = _mmap_npz(path)
+        self.kind = int(self.arrays["kind"])
+        self.source_sha256 = str(self.arrays.get("source_sha256", ""))
+
+        if self.kind == KIND_LINEAR:
+            self.coef = np.asarray(self.arrays["coef"])
+            self.intercept = float(self.arrays["intercept"])
+            self.n_features_in_ = self.coef.size
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        if self.kind == KIND_LINEAR:
+            return X @ self.coef + self.intercept
+
+        return self._predict_trees(X)
+
+    def _predict_trees(self, X: np.ndarray) -> np.ndarray:
+        a = self.arrays
+        left, right = a["children_left"], a["children_right"]
+        feature, threshold, value = a["feature"], a["threshold"], a["value"]
+        roots = np.asarray(a["roots"])
+
+        # Walk all (row, tree) pairs down their trees simultaneously
+        rows = np.repeat(np.arange(X.shape[0]), roots.size)
+        node = np.tile(roots, X.shape[0])
+
+        active = left[node] != -1
+        while active.any():
+            idx = np.nonzero(active)[0]
+            n = node[idx]
+            go_left = X[rows[idx], feature[n]] <= threshold[n]
+            node[idx] = np.where(go_left, left[n], right[n])
+            active[idx] = left[node[idx]] != -1
+
+        return value[node].reshape(X.shape[0], roots.size).mean(axis=1)
+
+
+# --------------------------------------------------
+# Parity check against the pickle
+# --------------------------------------------------
+def verify_parity(pkl_path: str = FLOOD_MODEL_PATH, npz_path: str = FLOOD_NATIVE_PATH, n: int = 2000):
+    import joblib
+
+    reference = joblib.load(pkl_path)
+    native = NativeFloodModel(npz_path)
+
+    rng = np.random.default_rng(0)
+    X = np.column_stack([
+        rng.uniform(10, 35, size=(n, 3)),          # monthly mean temps (°C)
+        rng.integers(1, 13, size=n),               # current month
+    ])
+
+    np.testing.assert_allclose(native.predict(X), reference.predict(X), rtol=1e-9, atol=1e-6)
+
+    for row in X[:50]:
+        single = float(native.predict([row])[0])
+        np.testing.assert_allclose(single, reference.predict([row])[0], rtol=1e-9, atol=1e-6)
+
+    print(f"[flood_native] Parity OK on {n} rows ({type(reference).__name__})")
+
+
+if __name__ == "__main__":
+    import joblib
+
+    export_model(joblib.load(FLOOD_MODEL_PATH), source_sha256=file_sha256(FLOOD_MODEL_PATH))
+    print(f"[flood_native] Wrote {FLOOD_NATIVE_PATH}")
+    verify_parity()
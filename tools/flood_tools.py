@@ -5,25 +5,50 @@ import calendar
 from datetime import date, datetime
 from typing import Dict, Any, List, Optional
 
-import requests
 from langchain_core.tools import tool
-from config.settings import FLOOD_MODEL_PATH, DEMO_MODE
+from config.settings import FLOOD_MODEL_PATH, FLOOD_NATIVE_PATH, DEMO_MODE, CACHE_TTL_FLOOD
+from tools.flood_grid import lookup_flood_grid
+from tools.temperature_store import monthly_mean_temp
+from tools.shared_cache import cache_get, get_or_compute, make_key
 
 # --------------------------------------------------
-# Load PKL model ONLY when DEMO_MODE is FALSE
+# Load model ONLY when DEMO_MODE is FALSE
+# (native .npz export preferred; PKL is the fallback)
 # --------------------------------------------------
 flood_model = None
 if not DEMO_MODE:
-    import joblib
+    if os.path.exists(FLOOD_NATIVE_PATH):
+        try:
+            from tools.flood_native import NativeFloodModel, file_sha256
+
+            flood_model = NativeFloodModel(FLOOD_NATIVE_PATH)
+
+            # Export must come from the current pickle (retrained -> re-export)
+            if (
+                os.path.exists(FLOOD_MODEL_PATH)
+                and flood_model.source_sha256 != file_sha256(FLOOD_MODEL_PATH)
+            ):
+                print(
+                    "[flood_tools] Warning: flood_model.npz is stale (pickle changed); "
+                    "using the pickle. Re-run: python -m tools.flood_native"
+                )
+                flood_model = None
+            else:
+                print("[flood_tools] Native flood model loaded successfully.")
+        except Exception as e:
+            print(f"[flood_tools] ERROR loading native flood model: {e}")
+            flood_model = None
+
+    if flood_model is None and os.path.exists(FLOOD_MODEL_PATH):
+        import joblib
 
-    if os.path.exists(FLOOD_MODEL_PATH):
         try:
             flood_model = joblib.load(FLOOD_MODEL_PATH)
             print("[flood_tools] Flood model loaded successfully.")
         except Exception as e:
             print(f"[flood_tools] ERROR loading flood model: {e}")
             flood_model = None
-    else:
+    elif flood_model is None:
         print(f"[flood_tools] Warning: flood model not found at {FLOOD_MODEL_PATH}")
 else:
     print("[flood_tools] DEMO_MODE=True: flood model will not be loaded.")
@@ -57,35 +82,8 @@ def _last_n_full_months(n: int = 3):
 
 
 def _fetch_monthly_avg_temp(lat: float, lon: float, year: int, month: int):
-    start, end = _month_date_range(year, month)
-
-    url = "https://archive-api.open-meteo.com/v1/archive"
-    params = {
-        "latitude": lat,
-        "longitude": lon,
-        "start_date": start.isoformat(),
-        "end_date": end.isoformat(),
-        "daily": "temperature_2m_mean",
-        "timezone": "UTC",
-    }
-
-    resp = requests.get(url, params=params, timeout=30)
-    if resp.status_code != 200:
-        print(f"[flood_tools] Open-Meteo error {resp.status_code}: {resp.text}")
-        return None
-
-    data = resp.json()
-    temps = data.get("daily", {}).get("temperature_2m_mean", [])
-
-    if not temps:
-        print(f"[flood_tools] No temps for {year}-{month:02d}")
-        return None
-
-    clean = [t for t in temps if t is not None]
-    if not clean:
-        return None
-
-    return sum(clean) / len(clean)
+    # Served from the local daily store; Open-Meteo is only hit to sync new days
+    return monthly_mean_temp(lat, lon, year, month)
 
 
 def _categorize_flood_risk(pred: float) -> str:
@@ -124,6 +122,62 @@ def fetch_flood_risk_tool(lat: float, lon: float) -> Dict[str, Any]:
 
     # REAL MODE
     months = _last_n_full_months(3)
+
+    # Precomputed grid for this month (no network, no model call)
+    cell = lookup_flood_grid(lat, lon)
+    if cell is not None:
+        m1, m2, m3 = cell["temps"]
+        predicted = cell["predicted_rainfall_mm"]
+        return {
+            "mode": "grid",
+            "lat": lat,
+            "lon": lon,
+            "grid_cell": {"lat": cell["cell_lat"], "lon": cell["cell_lon"]},
+            "months": [
+                {"year": y, "month": m, "avg_temp": t}
+                for (y, m), t in zip(months, cell["temps"])
+            ],
+            "features": {
+                "month_1_avg_temp": m1,
+                "month_2_avg_temp": m2,
+                "month_3_avg_temp": m3,
+                "current_month": datetime.utcnow().month,
+            },
+            "predicted_rainfall_mm": predicted,
+            "flood_risk": _categorize_flood_risk(predicted),
+        }
+
+    if lat is None or lon is None:
+        return _predict_live(lat, lon, months)
+
+    # Live result shared across worker processes for the month
+    y_now, m_now = datetime.utcnow().year, datetime.utcnow().month
+    return get_or_compute(
+        make_key("flood", round(lat, 4), round(lon, 4), y_now, m_now),
+        CACHE_TTL_FLOOD,
+        lambda: _predict_live(lat, lon, months),
+        cacheable=lambda v: "error" not in v and "warning" not in v,
+    )
+
+
+def known_flood_risk(lat: float, lon: float) -> str | None:
+    """Flood category from the grid or the shared cache only (never computes)."""
+    if lat is None or lon is None:
+        return None
+
+    cell = lookup_flood_grid(lat, lon)
+    if cell is not None:
+        return _categorize_flood_risk(cell["predicted_rainfall_mm"])
+
+    now = datetime.utcnow()
+    cached = cache_get(make_key("flood", round(lat, 4), round(lon, 4), now.year, now.month))
+    return (cached or {}).get("flood_risk")
+
+
+# --------------------------------------------------
+# Live prediction (grid miss)
+# --------------------------------------------------
+def _predict_live(lat: float, lon: float, months) -> Dict[str, Any]:
     temps = []
 
     for y, m in months:
@@ -0,0 +1,161 @@
+# tools/iot_analytics.py
+
+import time
+import threading
+from datetime import datetime
+
+import numpy as np
+
+# Sensor keys stored under IoT/SensorReadings/<reading>
+METRICS = ("soilMoisture", "soilTemp", "humidity")
+
+BUFFER_CAPACITY = 512         # readings kept per field
+STUCK_MIN_READINGS = 6        # identical values in a row => stuck sensor
+ANOMALY_Z = 3.0               # |z| of latest reading vs window
+
+
+# --------------------------------------------------
+# Helpers
+# --------------------------------------------------
+def to_epoch(ts) -> float | None:
+    """RTDB timestamps may be ISO strings or epoch seconds / millis."""
+    if ts is None:
+        return None
+    if isinstance(ts, (int, float)):
+        return ts / 1000.0 if ts > 1e11 else float(ts)
+    try:
+        return datetime.fromisoformat(str(ts).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def _as_float(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+# --------------------------------------------------
+# Per-field ring buffer
+# --------------------------------------------------
+class FieldRingBuffer:
+    """Fixed-size NumPy ring buffer of (timestamp, metrics...) rows."""
+
+    def __init__(self, capacity: int = BUFFER_CAPACITY):
+        self.capacity = capacity
+        self.data = np.full((capacity, 1 + len(METRICS)), np.nan)
+        self.size = 0
+        self.head = 0            # next write position
+        self.last_ts = -np.inf
+
+    def append(self, ts: float, values):
+        self.data[self.head, 0] = ts
+        self.data[self.head, 1:] = values
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.last_ts = max(self.last_ts, ts)
+
+    def view(self) -> np.ndarray:
+        """Rows in chronological order."""
+        rows = self.data[: self.size]
+        return rows[np.argsort(rows[:, 0], kind="stable")]
+
+
+_buffers: dict[str, FieldRingBuffer] = {}
+_lock = threading.Lock()
+
+
+def ingest_readings(field_key: str, readings):
+    """Append readings newer than what the field's buffer already holds."""
+    rows = []
+    for r in readings or []:
+        if not isinstance(r, dict):
+            continue
+        ts = to_epoch(r.get("timestamp"))
+        if ts is None:
+            continue
+        rows.append((ts, [_as_float(r.get(m)) for m in METRICS]))
+
+    rows.sort(key=lambda x: x[0])
+
+    with _lock:
+        buf = _buffers.setdefault(field_key, FieldRingBuffer())
+        for ts, values in rows[-buf.capacity:]:
+            if ts > buf.last_ts:
+                buf.append(ts, values)
+
+
+# --------------------------------------------------
+# Feature extraction (vectorized over the buffer)
+# --------------------------------------------------
+def _metric_stats(t_hours: np.ndarray, v: np.ndarray) -> dict | None:
+    ok = ~np.isnan(v)
+    if not ok.any():
+        return None
+
+    t, v = t_hours[ok], v[ok]
+    latest = v[-1]
+
+    stats = {
+        "latest": round(float(latest), 2),
+        "mean": round(float(v.mean()), 2),
+        "min": round(float(v.min()), 2),
+        "max": round(float(v.max()), 2),
+    }
+
+    # Linear trend over the window (units per hour)
+    if v.size >= 3 and np.ptp(t) > 0:
+        stats["slope_per_hour"] = round(float(np.polyfit(t, v, 1)[0]), 3)
+
+    # Latest reading far outside the rest of the window
+    if v.size >= 8:
+        ref = v[:-1]
+        std = ref.std()
+        if std > 0:
+            stats["anomaly"] = bool(abs(latest - ref.mean()) / std > ANOMALY_Z)
+
+    # Sensor reporting the exact same value repeatedly
+    if v.size >= STUCK_MIN_READINGS:
+        stats["stuck"] = bool(np.ptp(v[-STUCK_MIN_READINGS:]) == 0)
+
+    return stats
+
+
+def field_features(field_key: str, window_hours: float = 72.0) -> dict | None:
+    """Compact summary of a field's recent sensor history."""
+    with _lock:
+        buf = _buffers.get(field_key)
+        rows = buf.view().copy() if buf is not None and buf.size else None
+
+    if rows is None:
+        return None
+
+    t_end = rows[-1, 0]
+    rows = rows[rows[:, 0] >= t_end - window_hours * 3600]
+    t_hours = (rows[:, 0] - t_end) / 3600.0
+
+    features = {
+        "n_readings": int(rows.shape[0]),
+        "window_hours": round(float(-t_hours[0]), 1),
+        "hours_since_last": round(float(time.time() - t_end) / 3600.0, 1),
+    }
+
+    for k, name in enumerate(METRICS, start=1):
+        stats = _metric_stats(t_hours, rows[:, k])
+        if stats is not None:
+            features[name] = stats
+
+    # Diurnal range: soil temperature spread over the last 24 h
+    temp = rows[t_hours >= -24.0, 1 + METRICS.index("soilTemp")]
+    temp = temp[~np.isnan(temp)]
+    if temp.size >= 2:
+        features["diurnal_temp_range"] = round(float(np.ptp(temp)), 2)
+
+    return features
+
+
+def compact_iot_context(iot_data: dict | None, features: dict | None) -> dict:
+    """What the LLM sees: latest reading + summary, not the raw history."""
+    latest = (iot_data or {}).get("latest") if isinstance(iot_data, dict) else None
+    return {"latest": latest, "features": features}
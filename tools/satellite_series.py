@@ -0,0 +1,99 @@
+# tools/satellite_series.py
+#
+# Local cache of per-field Sentinel-2 index time series, plus trend
+# features. Earth Engine access lives in satellite_tools.py; this module
+# only stores, merges and summarizes rows of (time_ms, NDSSI, NDRE, NDNI).
+
+import os
+
+import numpy as np
+from config.settings import SATELLITE_SERIES_DIR
+
+INDICES = ("NDSSI", "NDRE", "NDNI")
+
+_DAY_MS = 86_400_000
+
+
+def _path(lat: float, lon: float) -> str:
+    return os.path.join(SATELLITE_SERIES_DIR, f"{lat:.5f}_{lon:.5f}.npz")
+
+
+def load_series(lat: float, lon: float):
+    """Cached series as (t_ms int64[n], values float64[n, 3])."""
+    path = _path(lat, lon)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=np.int64), np.empty((0, len(INDICES)))
+
+    with np.load(path) as data:
+        return data["t"], data["values"]
+
+
+def merge_rows(lat: float, lon: float, rows) -> tuple:
+    """
+    Append EE rows [[t_ms, NDSSI, NDRE, NDNI], ...] to the cached series.
+    Scenes on the same acquisition time (tile overlaps) are averaged.
+    """
+    t_old, v_old = load_series(lat, lon)
+    if not rows:
+        return t_old, v_old
+
+    new = np.array(
+        [[np.nan if x is None else x for x in row] for row in rows],
+        dtype=np.float64,
+    )
+    t = np.concatenate([t_old, new[:, 0].astype(np.int64)])
+    v = np.concatenate([v_old, new[:, 1:]])
+
+    t_unique, inverse = np.unique(t, return_inverse=True)
+    sums = np.zeros((t_unique.size, v.shape[1]))
+    counts = np.zeros((t_unique.size, v.shape[1]))
+    ok = ~np.isnan(v)
+    np.add.at(sums, inverse, np.where(ok, v, 0.0))
+    np.add.at(counts, inverse, ok)
+    with np.errstate(invalid="ignore"):
+        values = sums / counts
+
+    os.makedirs(SATELLITE_SERIES_DIR, exist_ok=True)
+    path = _path(lat, lon)
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, t=t_unique, values=values)
+    os.replace(tmp, path)
+
+    return t_unique, values
+
+
+# --------------------------------------------------
+# Trend features
+# --------------------------------------------------
+def _ewma(v: np.ndarray, alpha: float) -> float:
+    weights = (1 - alpha) ** np.arange(v.size)[::-1]
+    return float(np.sum(weights * v) / np.sum(weights))
+
+
+def trend_features(t_ms: np.ndarray, values: np.ndarray, window_days: int = 90, alpha: float = 0.4) -> dict:
+    """Smoothed value and slope (per 30 days) for each index over the window."""
+    if t_ms.size == 0:
+        return {}
+
+    recent = t_ms >= t_ms[-1] - window_days * _DAY_MS
+    t_days = (t_ms[recent] - t_ms[-1]) / _DAY_MS
+
+    out = {"n_scenes": int(recent.sum()), "window_days": window_days}
+
+    for k, name in enumerate(INDICES):
+        v = values[recent, k]
+        ok = ~np.isnan(v)
+        if not ok.any():
+            continue
+
+        stats = {
+            "latest": round(float(v[ok][-1]), 4),
+            "smoothed": round(_ewma(v[ok], alpha), 4),
+        }
+        if ok.sum() >= 3 and np.ptp(t_days[ok]) > 0:
+            slope_per_day = np.polyfit(t_days[ok], v[ok], 1)[0]
+            stats["slope_per_30d"] = round(float(slope_per_day * 30), 4)
+
+        out[name] = stats
+
+    return out
@@ -1,6 +1,10 @@
 import ee
+import numpy as np
 from datetime import datetime
 from langchain_core.tools import tool
+from config.settings import CACHE_TTL_SATELLITE, SATELLITE_SERIES_START
+from tools.shared_cache import get_or_compute, make_key
+from tools.satellite_series import INDICES, load_series, merge_rows, trend_features
 
 # Initialize GEE (safe for repeated imports)
 try:
@@ -23,45 +27,92 @@ def compute_ndni(image):
     return image.addBands(ndni.rename("NDNI"))
 
 
-@tool
-def fetch_satellite_tool(lat: float, lon: float):
+def _fetch_index_rows(lat: float, lon: float, since_ms: int | None = None):
     """
-    Fetch NDSSI, NDRE, NDNI from Sentinel-2 surface reflectance.
+    One Earth Engine call: index values at the point for every scene after
+    since_ms (or SATELLITE_SERIES_START), as [[t_ms, NDSSI, NDRE, NDNI], ...].
     """
-
     point = ee.Geometry.Point(lon, lat)
+    start = ee.Date(since_ms) if since_ms is not None else SATELLITE_SERIES_START
 
     # Sentinel-2 surface reflectance (best suited for agronomy)
     collection = (
         ee.ImageCollection("COPERNICUS/S2_SR")
         .filterBounds(point)
-        .filterDate("2024-01-01", datetime.utcnow().strftime("%Y-%m-%d"))
+        .filterDate(start, datetime.utcnow().strftime("%Y-%m-%d"))
         .filter(ee.Filter.lt("CLOUDY_PIXEL_PERCENTAGE", 20))
     )
 
-    image = ee.Image(collection.sort("system:time_start", False).first())
+    def _sample(image):
+        image = compute_ndni(compute_ndre(compute_ndssi(image)))
+        stats = image.select(list(INDICES)).reduceRegion(
+            reducer=ee.Reducer.mean(),
+            geometry=point,
+            scale=10,
+            bestEffort=True
+        )
+        return ee.Feature(None, stats).set("t", image.get("system:time_start"))
 
-    if image is None:
-        return {"error": "No satellite data found for this location"}
+    samples = collection.map(_sample).filter(ee.Filter.notNull(list(INDICES)))
+
+    return (
+        samples.reduceColumns(ee.Reducer.toList(1 + len(INDICES)), ["t", *INDICES])
+        .get("list")
+        .getInfo()
+    )
 
-    # Add indexes
-    image = compute_ndssi(image)
-    image = compute_ndre(image)
-    image = compute_ndni(image)
 
-    # Sample pixel
-    pixel = image.reduceRegion(
-        reducer=ee.Reducer.mean(),
-        geometry=point,
-        scale=10,
-        bestEffort=True
-    ).getInfo()
+def _as_json_number(v):
+    return None if v is None or np.isnan(v) else float(v)
+
+
+def _fetch_indices(lat: float, lon: float):
+    if lat is None or lon is None:
+        return {"error": "No location for this field"}
+
+    # Only scenes newer than the last cached acquisition are requested
+    t_cached, _ = load_series(lat, lon)
+    since = int(t_cached[-1]) + 1 if t_cached.size else None
+
+    try:
+        rows = _fetch_index_rows(lat, lon, since)
+    except Exception as e:
+        print(f"[satellite_tools] Earth Engine error: {e}")
+        rows = []
+
+    t, values = merge_rows(lat, lon, rows)
+
+    if t.size == 0:
+        return {"error": "No satellite data found for this location"}
+
+    latest = values[-1]
 
     return {
         "lat": lat,
         "lon": lon,
         "timestamp": datetime.utcnow().isoformat() + "Z",
-        "NDSSI": float(pixel.get("NDSSI", None)),
-        "NDRE": float(pixel.get("NDRE", None)),
-        "NDNI": float(pixel.get("NDNI", None)),
+        "acquired": datetime.utcfromtimestamp(t[-1] / 1000).isoformat() + "Z",
+        "NDSSI": _as_json_number(latest[0]),
+        "NDRE": _as_json_number(latest[1]),
+        "NDNI": _as_json_number(latest[2]),
+        "trend": trend_features(t, values),
     }
+
+
+@tool
+def fetch_satellite_tool(lat: float, lon: float):
+    """
+    Fetch NDSSI, NDRE, NDNI from Sentinel-2 surface reflectance:
+    latest scene values plus trend features over the field's time series.
+    """
+
+    if lat is None or lon is None:
+        return _fetch_indices(lat, lon)
+
+    # Shared across worker processes; scenes change every few days at most
+    return get_or_compute(
+        make_key("satellite", round(lat, 4), round(lon, 4)),
+        CACHE_TTL_SATELLITE,
+        lambda: _fetch_indices(lat, lon),
+        cacheable=lambda v: "error" not in v,
+    )
@@ -0,0 +1,104 @@
+# tools/shared_cache.py
+#
+# Small TTL cache in SQLite so every worker process sees the same entries.
+# Connections are opened per process/thread, which keeps it fork-safe.
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from config.settings import SHARED_CACHE_DB_PATH
+from services.singleflight import SingleFlight
+
+_local = threading.local()
+_flights = SingleFlight()
+_last_purge = 0.0
+
+
+def _conn() -> sqlite3.Connection:
+    pid = os.getpid()
+    conn = getattr(_local, "conn", None)
+
+    if conn is None or getattr(_local, "pid", None) != pid:
+        os.makedirs(os.path.dirname(SHARED_CACHE_DB_PATH), exist_ok=True)
+        conn = sqlite3.connect(SHARED_CACHE_DB_PATH, timeout=5, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+        _local.conn = conn
+        _local.pid = pid
+
+    return conn
+
+
+def make_key(namespace: str, *parts) -> str:
+    return namespace + ":" + json.dumps(parts, default=str)
+
+
+def cache_get(key: str):
+    try:
+        row = _conn().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+    except sqlite3.Error as e:
+        print(f"[shared_cache] read error: {e}")
+        return None
+
+    if row is None or row[1] < time.time():
+        return None
+    return json.loads(row[0])
+
+
+def cache_set(key: str, value, ttl: float):
+    try:
+        _conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+    except sqlite3.Error as e:
+        print(f"[shared_cache] write error: {e}")
+        return
+
+    maybe_purge()
+
+
+def get_or_compute(key: str, ttl: float, compute, cacheable=lambda v: True):
+    """Return the cached value for key, or compute, store and return it."""
+    value = cache_get(key)
+    if value is not None:
+        return value
+
+    def _compute_and_store():
+        result = compute()
+        if result is not None and cacheable(result):
+            cache_set(key, result, ttl)
+        return result
+
+    # Concurrent misses for the same key share one backend call
+    value, _ = _flights.do(key, _compute_and_store)
+    return value
+
+
+def purge_expired() -> int:
+    global _last_purge
+    _last_purge = time.time()
+    cur = _conn().execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+    return cur.rowcount
+
+
+def maybe_purge(interval_seconds: int = 600):
+    """Run purge_expired at most once per interval (cheap to call per write)."""
+    if time.time() - _last_purge < interval_seconds:
+        return
+    try:
+        purge_expired()
+    except sqlite3.Error as e:
+        print(f"[shared_cache] purge error: {e}")
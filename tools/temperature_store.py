@@ -0,0 +1,225 @@
+# tools/temperature_store.py
+
+import os
+import json
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import requests
+from services.singleflight import SingleFlight
+from config.settings import (
+    TEMPERATURE_STORE_DIR,
+    TEMPERATURE_CELL_STEP,
+    TEMPERATURE_HISTORY_START,
+    TEMPERATURE_RESYNC_SECONDS,
+    TEMPERATURE_RETRY_SECONDS,
+)
+
+# --------------------------------------------------
+# Layout (one directory per grid cell):
+#   <cell>/YYYY.npy          float32[366]  daily mean temp by day-of-year
+#   <cell>/YYYY_monthly.npy  float32[12]   precomputed monthly means
+#   <cell>/meta.json         last stored day, last sync + last failed sync time
+# Missing values are NaN.
+# --------------------------------------------------
+
+
+_syncs = SingleFlight()
+
+
+def _cell(lat: float, lon: float):
+    step = TEMPERATURE_CELL_STEP
+    clat = round(round(lat / step) * step, 4)
+    clon = round(round(lon / step) * step, 4)
+    return clat, clon
+
+
+def _cell_dir(clat: float, clon: float) -> str:
+    return os.path.join(TEMPERATURE_STORE_DIR, f"{clat:.4f}_{clon:.4f}")
+
+
+def _save_atomic(path: str, arr: np.ndarray):
+    tmp = path + ".tmp.npy"
+    np.save(tmp, arr)
+    os.replace(tmp, path)
+
+
+def _load_year(cell_dir: str, year: int) -> np.ndarray:
+    path = os.path.join(cell_dir, f"{year}.npy")
+    if os.path.exists(path):
+        return np.load(path)
+    return np.full(366, np.nan, dtype=np.float32)
+
+
+def _read_meta(cell_dir: str) -> dict:
+    path = os.path.join(cell_dir, "meta.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_meta(cell_dir: str, meta: dict):
+    path = os.path.join(cell_dir, "meta.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, path)
+
+
+def _day_index(d: date) -> int:
+    return d.timetuple().tm_yday - 1
+
+
+# --------------------------------------------------
+# Sync source: Open-Meteo archive
+# --------------------------------------------------
+def _download_daily(lat: float, lon: float, start: date, end: date):
+    try:
+        resp = requests.get(
+            "https://archive-api.open-meteo.com/v1/archive",
+            params={
+                "latitude": lat,
+                "longitude": lon,
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+                "daily": "temperature_2m_mean",
+                "timezone": "UTC",
+            },
+            timeout=30,
+        )
+    except requests.RequestException as e:
+        print(f"[temperature_store] Open-Meteo request failed: {e}")
+        return None, None
+
+    if resp.status_code != 200:
+        print(f"[temperature_store] Open-Meteo error {resp.status_code}: {resp.text}")
+        return None, None
+
+    try:
+        daily = resp.json().get("daily", {})
+    except ValueError as e:
+        print(f"[temperature_store] Open-Meteo returned invalid JSON: {e}")
+        return None, None
+    days = np.array(daily.get("time", []), dtype="datetime64[D]")
+    temps = np.array(
+        [np.nan if t is None else t for t in daily.get("temperature_2m_mean", [])],
+        dtype=np.float32,
+    )
+    return days, temps
+
+
+def _append(cell_dir: str, days: np.ndarray, temps: np.ndarray) -> date | None:
+    """Write new days into yearly chunks and refresh their monthly means."""
+    years = days.astype("datetime64[Y]").astype(int) + 1970
+    last_valid = None
+
+    for year in np.unique(years):
+        mask = years == year
+        chunk = _load_year(cell_dir, int(year))
+
+        year_start = np.datetime64(f"{year}-01-01")
+        idx = (days[mask] - year_start).astype(int)
+        chunk[idx] = temps[mask]
+        _save_atomic(os.path.join(cell_dir, f"{year}.npy"), chunk)
+
+        # Monthly means over the whole year chunk (vectorized)
+        day_dates = year_start + np.arange(366)
+        months = day_dates.astype("datetime64[M]").astype(int) % 12
+        in_year = day_dates.astype("datetime64[Y]") == year_start.astype("datetime64[Y]")
+        monthly = np.full(12, np.nan, dtype=np.float32)
+        for m in range(12):
+            vals = chunk[in_year & (months == m)]
+            if not np.isnan(vals).all():
+                monthly[m] = np.nanmean(vals)
+        _save_atomic(os.path.join(cell_dir, f"{year}_monthly.npy"), monthly)
+
+    valid = days[~np.isnan(temps)]
+    if valid.size:
+        last_valid = valid.max().astype(object)
+
+    return last_valid
+
+
+def sync_cell(lat: float, lon: float, until: date | None = None) -> date | None:
+    """Fetch only the days after the last stored one. Returns last stored day."""
+    clat, clon = _cell(lat, lon)
+    cell_dir = _cell_dir(clat, clon)
+    os.makedirs(cell_dir, exist_ok=True)
+
+    meta = _read_meta(cell_dir)
+    last_day = date.fromisoformat(meta["last_day"]) if meta.get("last_day") else None
+
+    start = (last_day + timedelta(days=1)) if last_day else date.fromisoformat(TEMPERATURE_HISTORY_START)
+    end = until or (date.today() - timedelta(days=1))
+
+    if start <= end:
+        days, temps = _download_daily(clat, clon, start, end)
+        if days is None:
+            # Failed download: keep synced_at, back off before the next try
+            meta["failed_at"] = time.time()
+            _write_meta(cell_dir, meta)
+            return last_day
+        if days.size:
+            new_last = _append(cell_dir, days, temps)
+            if new_last is not None and (last_day is None or new_last > last_day):
+                last_day = new_last
+
+    meta["synced_at"] = time.time()
+    meta.pop("failed_at", None)
+
+    if last_day is not None:
+        meta["last_day"] = last_day.isoformat()
+    _write_meta(cell_dir, meta)
+
+    return last_day
+
+
+# --------------------------------------------------
+# Queries
+# --------------------------------------------------
+def read_range(lat: float, lon: float, start: date, end: date):
+    """Daily temperatures for [start, end] as (datetime64[D] array, float32 array)."""
+    cell_dir = _cell_dir(*_cell(lat, lon))
+    days = np.arange(np.datetime64(start), np.datetime64(end) + 1)
+    out = np.full(days.size, np.nan, dtype=np.float32)
+
+    for year in range(start.year, end.year + 1):
+        chunk = _load_year(cell_dir, year)
+        year_start = np.datetime64(f"{year}-01-01")
+        mask = days.astype("datetime64[Y]") == year_start.astype("datetime64[Y]")
+        out[mask] = chunk[(days[mask] - year_start).astype(int)]
+
+    return days, out
+
+
+def monthly_mean_temp(lat: float, lon: float, year: int, month: int):
+    """Mean daily temperature for a month, syncing the cell only if needed."""
+    clat, clon = _cell(lat, lon)
+    cell_dir = _cell_dir(clat, clon)
+    meta = _read_meta(cell_dir)
+
+    month_end = (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1))
+    last_day = date.fromisoformat(meta["last_day"]) if meta.get("last_day") else None
+    recently_synced = time.time() - meta.get("synced_at", 0) < TEMPERATURE_RESYNC_SECONDS
+    recently_failed = time.time() - meta.get("failed_at", 0) < TEMPERATURE_RETRY_SECONDS
+
+    # Missing data triggers a sync; otherwise (or after a failure) use what is stored
+    if (last_day is None or last_day < month_end) and not (recently_synced or recently_failed):
+        # One download per cell even when many requests miss at once
+        _syncs.do((clat, clon), lambda: sync_cell(lat, lon))
+
+    path = os.path.join(cell_dir, f"{year}_monthly.npy")
+    if not os.path.exists(path):
+        return None
+
+    value = float(np.load(path)[month - 1])
+    return None if np.isnan(value) else value
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python -m tools.temperature_store <lat> <lon>
+    print(sync_cell(float(sys.argv[1]), float(sys.argv[2])))
@@ -0,0 +1,114 @@
+# workers/batch_runner.py
+#
+# Scheduled / bulk consultations with packed LLM prompts:
+#   python -m workers.batch_runner                 # every field in RTDB
+#   python -m workers.batch_runner farmer/field …  # selected fields
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from state import AgentState
+from config.settings import LLM_BATCH_SIZE
+from services.admission import admission
+from nodes.fetch_nodes import (
+    node_fetch_field_and_farmer,
+    node_fetch_iot,
+    node_fetch_satellite,
+    node_fetch_carbon,
+    node_fetch_flood,
+    config_error,
+)
+from nodes.batch_nodes import detect_problems_batch, plan_solutions_batch
+from graph import (
+    node_abort,
+    node_save_output,
+    needs_location,
+    needs_problems,
+    skip_reason,
+)
+
+
+def _fetch_all(state: AgentState) -> AgentState:
+    # Bulk refreshes run as the lowest class (capped share of the slots)
+    with admission.slot("batch", timeout=float("inf")):
+        try:
+            return _fetch_field(state)
+        except Exception as e:
+            # One failing field must not take the rest of the batch down
+            print(f"[batch_runner] Fetch failed for {state.farmer_id}/{state.field_id}: {e}")
+            state.error = {
+                "code": "fetch_failed",
+                "message": str(e),
+                "farmer_id": state.farmer_id,
+                "field_id": state.field_id,
+            }
+            return state
+
+
+def _fetch_field(state: AgentState) -> AgentState:
+    state = node_fetch_field_and_farmer(state)
+
+    # Same early exit and preconditions as the graph
+    if config_error(state):
+        return node_abort(state)
+
+    state = node_fetch_iot(state)
+
+    for name, node in (
+        ("fetch_satellite", node_fetch_satellite),
+        ("fetch_carbon", node_fetch_carbon),
+        ("fetch_flood", node_fetch_flood),
+    ):
+        if skip_reason(state, name, needs_location) is None:
+            state = node(state)
+    return state
+
+
+def run_batch(fields, batch_size: int = LLM_BATCH_SIZE, fetch_workers: int = 4) -> list:
+    """Run the pipeline for many (farmer_id, field_id) pairs."""
+    states = [AgentState(farmer_id=a, field_id=b) for a, b in fields]
+
+    # Data fetching is I/O bound and per field
+    with ThreadPoolExecutor(max_workers=fetch_workers) as pool:
+        states = list(pool.map(_fetch_all, states))
+
+    ready = [s for s in states if not s.error]
+
+    detect_problems_batch(ready, batch_size)
+    plan_solutions_batch(
+        [s for s in ready if skip_reason(s, "plan_solutions", needs_problems) is None],
+        batch_size,
+    )
+
+    for state in ready:
+        node_save_output(state)
+
+    return [
+        {
+            "farmer_id": s.farmer_id,
+            "field_id": s.field_id,
+            "problems": s.problems,
+            "solutions": s.solutions,
+            "error": s.error,
+            "skipped": s.skipped,
+        }
+        for s in states
+    ]
+
+
+def _all_fields():
+    from tools.firebase_tools import rtdb_get_keys
+
+    for farmer_id in rtdb_get_keys("Farmers"):
+        for field_id in rtdb_get_keys(f"Farmers/{farmer_id}/Fields"):
+            yield farmer_id, field_id
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        targets = [tuple(arg.split("/", 1)) for arg in sys.argv[1:]]
+    else:
+        targets = list(_all_fields())
+
+    results = run_batch(targets)
+    print(f"[batch_runner] Completed {len(results)} fields")
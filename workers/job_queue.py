@@ -0,0 +1,288 @@
+# workers/job_queue.py
+#
+# Persistent job queue (SQLite) + worker pool for field agent runs.
+# Workers start inside the API process (JOB_WORKERS > 0) or standalone:
+#   JOB_WORKERS=4 python -m workers.job_queue
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+
+import requests
+from config.settings import (
+    ADMISSION_CLASSES,
+    JOBS_DB_PATH,
+    JOB_WORKERS,
+    JOB_WEBHOOK_TIMEOUT,
+    JOB_HEARTBEAT_SECONDS,
+    JOB_STALE_SECONDS,
+)
+from services.admission import Overloaded, admission
+
+
+# -------------------------------------------------------
+# Storage
+# -------------------------------------------------------
+os.makedirs(os.path.dirname(JOBS_DB_PATH), exist_ok=True)
+
+_conn = sqlite3.connect(JOBS_DB_PATH, check_same_thread=False, isolation_level=None)
+_conn.execute("PRAGMA journal_mode=WAL")
+_lock = threading.Lock()
+_wakeup = threading.Condition()
+
+_conn.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        id          TEXT PRIMARY KEY,
+        farmer_id   TEXT NOT NULL,
+        field_id    TEXT NOT NULL,
+        webhook_url TEXT,
+        status      TEXT NOT NULL,
+        result      TEXT,
+        error       TEXT,
+        created_at  REAL NOT NULL,
+        started_at  REAL,
+        finished_at REAL
+    )
+""")
+_conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+# Owner process + heartbeat of running jobs (queues created before these existed)
+_existing = {c[1] for c in _conn.execute("PRAGMA table_info(jobs)")}
+for _col, _type in (
+    ("owner", "TEXT"),
+    ("heartbeat_at", "REAL"),
+    ("priority", "TEXT NOT NULL DEFAULT 'interactive'"),  # admission class of the run
+):
+    if _col not in _existing:
+        _conn.execute(f"ALTER TABLE jobs ADD COLUMN {_col} {_type}")
+
+# Identifies this process; a restarted worker gets a new owner ID
+_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_COLUMNS = [
+    "id", "farmer_id", "field_id", "webhook_url", "status",
+    "result", "error", "created_at", "started_at", "finished_at", "priority",
+]
+
+# Higher-weight classes are claimed first; FIFO within a class
+_CLAIM_ORDER = "CASE priority {} ELSE {} END, created_at".format(
+    " ".join(
+        f"WHEN '{name}' THEN {rank}"
+        for rank, name in enumerate(
+            sorted(ADMISSION_CLASSES, key=lambda n: -ADMISSION_CLASSES[n]["weight"])
+        )
+    ),
+    len(ADMISSION_CLASSES),
+)
+
+
+def _row_to_job(row) -> dict:
+    job = dict(zip(_COLUMNS, row))
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def enqueue(
+    farmer_id: str,
+    field_id: str,
+    webhook_url: str | None = None,
+    priority: str = "interactive",
+) -> str:
+    if priority not in ADMISSION_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority}")
+
+    job_id = uuid.uuid4().hex
+    with _lock:
+        _conn.execute(
+            "INSERT INTO jobs (id, farmer_id, field_id, webhook_url, status, created_at, priority)"
+            " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, farmer_id, field_id, webhook_url, time.time(), priority),
+        )
+    with _wakeup:
+        _wakeup.notify()
+    return job_id
+
+
+def get_job(job_id: str) -> dict | None:
+    with _lock:
+        row = _conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def _claim_next() -> dict | None:
+    """Atomically move the next queued job (by priority, then age) to running."""
+    with _lock:
+        _conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = _conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs"
+                f" WHERE status = 'queued' ORDER BY {_CLAIM_ORDER} LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                _conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?,"
+                    " owner = ?, heartbeat_at = ? WHERE id = ?",
+                    (now, _OWNER, now, row[0]),
+                )
+            _conn.execute("COMMIT")
+        except Exception:
+            _conn.execute("ROLLBACK")
+            raise
+    return _row_to_job(row) if row else None
+
+
+def _finish(job_id: str, status: str, result=None, error: str | None = None):
+    with _lock:
+        _conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id),
+        )
+
+
+def _defer(job_id: str):
+    """Put a claimed job back at its original queue position."""
+    with _lock:
+        _conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL,"
+            " owner = NULL, heartbeat_at = NULL WHERE id = ?",
+            (job_id,),
+        )
+
+
+def heartbeat() -> int:
+    """Mark this process's running jobs as alive."""
+    with _lock:
+        cur = _conn.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND owner = ?",
+            (time.time(), _OWNER),
+        )
+    return cur.rowcount
+
+
+def requeue_interrupted(stale_seconds: float = JOB_STALE_SECONDS) -> int:
+    """
+    Jobs whose owner stopped heartbeating (crashed or restarted worker
+    process) go back to the queue; the job ID resumes its checkpoints.
+    """
+    with _lock:
+        cur = _conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL,"
+            " owner = NULL, heartbeat_at = NULL"
+            " WHERE status = 'running' AND COALESCE(heartbeat_at, started_at) < ?",
+            (time.time() - stale_seconds,),
+        )
+    return cur.rowcount
+
+
+# -------------------------------------------------------
+# Worker pool
+# -------------------------------------------------------
+def _notify_webhook(job: dict):
+    if not job.get("webhook_url"):
+        return
+    try:
+        requests.post(job["webhook_url"], json=job, timeout=JOB_WEBHOOK_TIMEOUT)
+    except Exception as e:
+        print(f"[job_queue] Webhook failed for {job['id']}: {e}")
+
+
+def _default_run(job: dict) -> dict:
+    from graph import run_field_agent
+
+    # job ID doubles as the checkpoint run ID -> requeued jobs resume
+    result = run_field_agent(job["farmer_id"], job["field_id"], run_id=job["id"])
+    return {
+        "run_id": result["run_id"],
+        "problems": result.get("problems", []),
+        "solutions": result.get("solutions", []),
+        "error": result.get("error"),
+        "skipped": result.get("skipped", []),
+    }
+
+
+class JobWorkerPool:
+    """Fixed number of threads draining the persistent queue."""
+
+    def __init__(self, n_workers: int = JOB_WORKERS, run_fn=_default_run, poll_seconds: float = 2.0):
+        self.n_workers = n_workers
+        self.run_fn = run_fn
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        t = threading.Thread(target=self._monitor, name="job-monitor", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+        for i in range(self.n_workers):
+            t = threading.Thread(target=self._loop, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        with _wakeup:
+            _wakeup.notify_all()
+
+    def _monitor(self):
+        """Heartbeat our jobs; requeue jobs of workers that went away."""
+        while not self._stop.is_set():
+            try:
+                heartbeat()
+                requeued = requeue_interrupted()
+                if requeued:
+                    print(f"[job_queue] Requeued {requeued} interrupted jobs")
+                    with _wakeup:
+                        _wakeup.notify_all()
+            except sqlite3.Error as e:
+                print(f"[job_queue] Monitor error: {e}")
+            self._stop.wait(JOB_HEARTBEAT_SECONDS)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            job = _claim_next()
+            if job is None:
+                # Woken by enqueue() in this process, or poll for other processes
+                with _wakeup:
+                    _wakeup.wait(self.poll_seconds)
+                continue
+
+            # Jobs run in the class set at enqueue; when shed they go back to the queue
+            priority = job["priority"]
+            try:
+                admission.acquire(priority)
+            except Overloaded as e:
+                _defer(job["id"])
+                self._stop.wait(min(e.retry_after, 60))
+                continue
+
+            start = time.monotonic()
+            try:
+                result = self.run_fn(job)
+                _finish(job["id"], "done", result=result)
+            except Exception as e:
+                print(f"[job_queue] Job {job['id']} failed: {e}")
+                _finish(job["id"], "failed", error=str(e))
+            finally:
+                admission.release(priority, time.monotonic() - start)
+
+            _notify_webhook(get_job(job["id"]))
+
+
+if __name__ == "__main__":
+    pool = JobWorkerPool(n_workers=max(JOB_WORKERS, 1))
+    pool.start()
+    print(f"[job_queue] {pool.n_workers} workers running")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,208 @@
+# workers/retention.py
+#
+# Periodic compaction (cron, e.g. nightly):
+#   python -m workers.retention
+#
+# - Raw IoT readings older than READINGS_RAW_RETENTION_DAYS are rolled into
+#   IoT/HourlyAggregates and IoT/DailyAggregates (min/mean/max per metric)
+#   and removed from IoT/SensorReadings.
+# - AIConsultations older than CONSULTATION_RETENTION_DAYS (beyond the
+#   latest CONSULTATION_KEEP_MIN) are appended to local gzip JSONL archives
+#   and removed from RTDB.
+# - Expired entries are purged from the shared tool cache.
+
+import os
+import gzip
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from config.settings import (
+    READINGS_RAW_RETENTION_DAYS,
+    CONSULTATION_RETENTION_DAYS,
+    CONSULTATION_KEEP_MIN,
+    RETENTION_UPDATE_BATCH,
+    ARCHIVE_DIR,
+)
+from tools.firebase_tools import rtdb_get, rtdb_get_keys, rtdb_update
+from tools.iot_analytics import METRICS, to_epoch
+from tools import shared_cache
+
+
+# -------------------------------------------------------
+# Aggregation helpers
+# -------------------------------------------------------
+def _summarize(readings: list) -> dict:
+    out = {"count": len(readings)}
+    for metric in METRICS:
+        values = [r[metric] for r in readings if isinstance(r.get(metric), (int, float))]
+        if values:
+            out[metric] = {
+                "n": len(values),
+                "min": min(values),
+                "mean": round(sum(values) / len(values), 3),
+                "max": max(values),
+            }
+    return out
+
+
+def _merge(old: dict | None, new: dict) -> dict:
+    """Combine an existing bucket with late readings (count-weighted means)."""
+    if not isinstance(old, dict) or not old.get("count"):
+        return new
+
+    out = {"count": old["count"] + new["count"]}
+    for metric in METRICS:
+        a, b = old.get(metric), new.get(metric)
+        if not isinstance(a, dict) or not isinstance(b, dict):
+            if isinstance(a, dict) or isinstance(b, dict):
+                out[metric] = a if isinstance(a, dict) else b
+            continue
+
+        # Buckets written before per-metric counts existed use the bucket count
+        na, nb = a.get("n", old["count"]), b["n"]
+        out[metric] = {
+            "n": na + nb,
+            "min": min(a["min"], b["min"]),
+            "mean": round((a["mean"] * na + b["mean"] * nb) / (na + nb), 3),
+            "max": max(a["max"], b["max"]),
+        }
+    return out
+
+
+def _existing_buckets(iot_path: str, kind: str, wanted) -> dict:
+    """Stored aggregates among `wanted` keys (late readings for compacted days)."""
+    present = set(rtdb_get_keys(f"{iot_path}/{kind}")) & set(wanted)
+    return {k: rtdb_get(f"{iot_path}/{kind}/{k}") for k in sorted(present)}
+
+
+def _midnight_utc_days_ago(days: int) -> datetime:
+    now = datetime.now(timezone.utc)
+    return (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# -------------------------------------------------------
+# 1. IoT readings -> hourly / daily aggregates
+# -------------------------------------------------------
+def compact_readings(farmer_id: str, field_id: str, retention_days: int = READINGS_RAW_RETENTION_DAYS) -> int:
+    """Returns the number of raw readings removed."""
+    iot_path = f"Farmers/{farmer_id}/Fields/{field_id}/IoT"
+    readings = rtdb_get(f"{iot_path}/SensorReadings") or {}
+
+    # Cutoff on a day boundary so hourly/daily buckets are never split
+    cutoff = _midnight_utc_days_ago(retention_days).timestamp()
+
+    by_day = defaultdict(list)   # "YYYY-MM-DD" -> [(key, reading, dt)]
+    for key, reading in readings.items():
+        if not isinstance(reading, dict):
+            continue
+        ts = to_epoch(reading.get("timestamp"))
+        if ts is None or ts >= cutoff:
+            continue
+        dt = datetime.fromtimestamp(ts, timezone.utc)
+        by_day[dt.strftime("%Y-%m-%d")].append((key, reading, dt))
+
+    if not by_day:
+        return 0
+
+    hours_by_day = {day: defaultdict(list) for day in by_day}
+    for day, entries in by_day.items():
+        for _, reading, dt in entries:
+            hours_by_day[day][dt.strftime("%Y-%m-%dT%H")].append(reading)
+
+    old_daily = _existing_buckets(iot_path, "DailyAggregates", by_day)
+    old_hourly = _existing_buckets(
+        iot_path, "HourlyAggregates", [h for hours in hours_by_day.values() for h in hours]
+    )
+
+    removed = 0
+    batch = {}
+
+    # Each update carries complete days (aggregates + deletions) so a crash
+    # never leaves a day half-compacted
+    for day in sorted(by_day):
+        entries = by_day[day]
+
+        batch[f"DailyAggregates/{day}"] = _merge(
+            old_daily.get(day), _summarize([r for _, r, _ in entries])
+        )
+        for hour, rs in hours_by_day[day].items():
+            batch[f"HourlyAggregates/{hour}"] = _merge(old_hourly.get(hour), _summarize(rs))
+        for key, _, _ in entries:
+            batch[f"SensorReadings/{key}"] = None
+
+        removed += len(entries)
+
+        if len(batch) >= RETENTION_UPDATE_BATCH:
+            rtdb_update(iot_path, batch)
+            batch = {}
+
+    if batch:
+        rtdb_update(iot_path, batch)
+
+    return removed
+
+
+# -------------------------------------------------------
+# 2. AIConsultations -> local compressed archive
+# -------------------------------------------------------
+def archive_consultations(
+    farmer_id: str,
+    field_id: str,
+    retention_days: int = CONSULTATION_RETENTION_DAYS,
+    keep_min: int = CONSULTATION_KEEP_MIN,
+) -> int:
+    """Returns the number of consultations archived and pruned."""
+    path = f"Farmers/{farmer_id}/Fields/{field_id}/AIConsultations"
+    consultations = rtdb_get(path) or {}
+
+    cutoff = _midnight_utc_days_ago(retention_days).timestamp()
+
+    # Push keys are chronological; never touch the newest keep_min
+    keys = sorted(consultations)[:-keep_min] if keep_min else sorted(consultations)
+    old = [
+        k for k in keys
+        if (to_epoch((consultations[k] or {}).get("timestamp")) or cutoff) < cutoff
+    ]
+    if not old:
+        return 0
+
+    archive_path = os.path.join(ARCHIVE_DIR, "consultations", farmer_id, f"{field_id}.jsonl.gz")
+    os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+
+    # Archive first; RTDB is pruned only after the file is written
+    with gzip.open(archive_path, "at", encoding="utf-8") as f:
+        for k in old:
+            f.write(json.dumps({"id": k, **(consultations[k] or {})}, ensure_ascii=False) + "\n")
+
+    for i in range(0, len(old), RETENTION_UPDATE_BATCH):
+        rtdb_update(path, {k: None for k in old[i:i + RETENTION_UPDATE_BATCH]})
+
+    # The API's history pages expire on their own (HISTORY_CACHE_TTL_SECONDS);
+    # this process cannot reach their in-memory cache
+    return len(old)
+
+
+# -------------------------------------------------------
+# Entry point
+# -------------------------------------------------------
+def run_retention():
+    totals = {"fields": 0, "readings_removed": 0, "consultations_archived": 0}
+
+    for farmer_id in rtdb_get_keys("Farmers"):
+        for field_id in rtdb_get_keys(f"Farmers/{farmer_id}/Fields"):
+            try:
+                totals["readings_removed"] += compact_readings(farmer_id, field_id)
+                totals["consultations_archived"] += archive_consultations(farmer_id, field_id)
+                totals["fields"] += 1
+            except Exception as e:
+                print(f"[retention] {farmer_id}/{field_id} failed: {e}")
+
+    totals["cache_entries_purged"] = shared_cache.purge_expired()
+
+    print(f"[retention] {totals}")
+    return totals
+
+
+if __name__ == "__main__":
+    run_retention()
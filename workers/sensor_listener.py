@@ -0,0 +1,301 @@
+# workers/sensor_listener.py
+#
+# Long-running worker: python -m workers.sensor_listener
+# Listens to Farmers (one stream), dispatches events under
+# Farmers/*/Fields/*/IoT/SensorReadings by path and re-runs the field
+# agent only for fields whose readings cross a threshold or change a lot.
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import (
+    LISTENER_DEBOUNCE_SECONDS,
+    LISTENER_MIN_INTERVAL_SECONDS,
+    LISTENER_MAX_WORKERS,
+    SENSOR_THRESHOLDS,
+)
+from services.admission import Overloaded
+from tools.iot_analytics import ingest_readings, to_epoch
+
+
+# -------------------------------------------------------
+# Event parsing (paths are relative to a field's SensorReadings ref)
+# -------------------------------------------------------
+def parse_reading_event(path: str, data) -> list:
+    """Readings carried by one listener event ([] for deletions etc.)."""
+    parts = [p for p in (path or "").split("/") if p]
+    if not isinstance(data, dict):
+        return []
+
+    # "/" -> snapshot or multi-key patch, "/<reading>" -> one new reading
+    if not parts:
+        return [r for r in data.values() if isinstance(r, dict)]
+    if len(parts) == 1:
+        return [data]
+    return []
+
+
+# Farmers/<farmer>/Fields/<field>/IoT/SensorReadings, relative to "Farmers"
+_READINGS_PATH = ("*", "Fields", "*", "IoT", "SensorReadings")
+
+
+def split_farmers_event(path: str, data) -> list:
+    """
+    Split one event of the Farmers stream into per-field SensorReadings
+    events: [(farmer_id, field_id, relative path, data), ...]. Writes
+    elsewhere under Farmers (configs, consultations) yield nothing.
+    """
+    parts = [p for p in (path or "").split("/") if p]
+    depth = len(_READINGS_PATH)
+
+    for part, expected in zip(parts, _READINGS_PATH):
+        if expected != "*" and part != expected:
+            return []
+
+    if len(parts) >= depth:
+        return [(parts[0], parts[2], "/" + "/".join(parts[depth:]), data)]
+
+    # Event above the readings (initial snapshot, new field, patch):
+    # walk the data down to each field's SensorReadings
+    found = []
+
+    def walk(prefix, node):
+        if len(prefix) == depth:
+            found.append((prefix[0], prefix[2], "/", node))
+            return
+        if not isinstance(node, dict):
+            return
+        expected = _READINGS_PATH[len(prefix)]
+        for key, child in node.items():
+            if expected == "*" or key == expected:
+                walk(prefix + [key], child)
+
+    walk(parts, data)
+    return found
+
+
+def deleted_fields(path: str, data) -> list:
+    """(farmer_id, field_id | None) removed by this event (None = whole farmer)."""
+    parts = [p for p in (path or "").split("/") if p]
+    if data is not None:
+        return []
+    if len(parts) == 1:
+        return [(parts[0], None)]
+    if len(parts) == 3 and parts[1] == "Fields":
+        return [(parts[0], parts[2])]
+    return []
+
+
+def latest_reading(readings: list) -> dict:
+    return max(readings, key=lambda r: to_epoch(r.get("timestamp")) or 0.0)
+
+
+# -------------------------------------------------------
+# Trigger rules
+# -------------------------------------------------------
+def _band(value, limits) -> str:
+    if value < limits["low"]:
+        return "low"
+    if value > limits["high"]:
+        return "high"
+    return "ok"
+
+
+def trigger_reason(reading: dict, last_analyzed: dict | None) -> str | None:
+    """Why this reading warrants a new consultation (None = skip)."""
+    for metric, limits in SENSOR_THRESHOLDS.items():
+        value = reading.get(metric)
+        if not isinstance(value, (int, float)):
+            continue
+
+        prev = (last_analyzed or {}).get(metric)
+        band = _band(value, limits)
+
+        if not isinstance(prev, (int, float)):
+            if band != "ok":
+                return f"{metric}_{band}"
+            continue
+
+        if band != _band(prev, limits):
+            return f"{metric}_{band}" if band != "ok" else f"{metric}_recovered"
+
+        if abs(value - prev) >= limits["delta"]:
+            return f"{metric}_changed"
+
+    return None
+
+
+# -------------------------------------------------------
+# Event processor (no Firebase dependency; feed it any event stream)
+# -------------------------------------------------------
+class SensorEventProcessor:
+    """
+    Debounces reading bursts per field and runs at most one consultation
+    per field at a time. `run_fn(farmer_id, field_id)` does the work.
+    """
+
+    def __init__(
+        self,
+        run_fn,
+        debounce_seconds: float = LISTENER_DEBOUNCE_SECONDS,
+        min_interval_seconds: float = LISTENER_MIN_INTERVAL_SECONDS,
+        max_workers: int = LISTENER_MAX_WORKERS,
+        clock=time.monotonic,
+        executor=None,
+    ):
+        self.run_fn = run_fn
+        self.debounce_seconds = debounce_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self.clock = clock
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers)
+
+        self._lock = threading.Lock()
+        self._pending = {}        # field -> (due_at, latest reading)
+        self._in_flight = set()
+        self._last_analyzed = {}  # field -> reading used for last run (or baseline)
+        self._last_run_at = {}
+        self._seen = set()        # fields whose initial snapshot has arrived
+
+    def dispatch(self, event):
+        """Callback for `db.reference("Farmers").listen` (or a fake stream)."""
+        for farmer_id, field_id in deleted_fields(event.path, event.data):
+            self.forget(farmer_id, field_id)
+
+        for farmer_id, field_id, path, data in split_farmers_event(event.path, event.data):
+            self.handle_event(farmer_id, field_id, _FieldEvent(path, data))
+
+    def forget(self, farmer_id: str, field_id: str | None = None):
+        """Drop all state of a deleted field (or of every field of a farmer)."""
+        with self._lock:
+            for state in (self._pending, self._last_analyzed, self._last_run_at):
+                for key in [k for k in state if k[0] == farmer_id and field_id in (None, k[1])]:
+                    del state[key]
+            self._seen = {
+                k for k in self._seen if not (k[0] == farmer_id and field_id in (None, k[1]))
+            }
+
+    def handle_event(self, farmer_id: str, field_id: str, event):
+        """One event relative to a field's SensorReadings ref."""
+        key = (farmer_id, field_id)
+        readings = parse_reading_event(event.path, event.data)
+
+        with self._lock:
+            first = key not in self._seen
+            self._seen.add(key)
+
+        if not readings:
+            return
+
+        ingest_readings(f"{farmer_id}/{field_id}", readings)
+        latest = latest_reading(readings)
+
+        with self._lock:
+            # The first event is the stored history: baseline, not new data
+            if first and event.path == "/":
+                self._last_analyzed.setdefault(key, latest)
+                return
+
+            self._pending[key] = (self.clock() + self.debounce_seconds, latest)
+
+    def poll(self) -> list:
+        """Start runs for fields whose debounce window has passed."""
+        now = self.clock()
+        started = []
+
+        with self._lock:
+            for key, (due_at, reading) in list(self._pending.items()):
+                if due_at > now or key in self._in_flight:
+                    continue
+
+                del self._pending[key]
+
+                reason = trigger_reason(reading, self._last_analyzed.get(key))
+
+                # First reading of a field becomes its baseline, run or not,
+                # so later in-band drift is measured against it
+                self._last_analyzed.setdefault(key, reading)
+
+                if reason is None:
+                    continue
+
+                # Crossings always run; large changes are rate-limited
+                last_run = self._last_run_at.get(key)
+                if (
+                    reason.endswith("_changed")
+                    and last_run is not None
+                    and now - last_run < self.min_interval_seconds
+                ):
+                    continue
+
+                self._in_flight.add(key)
+                self._last_run_at[key] = now
+                started.append((key, reading, reason, last_run))
+
+        for key, reading, reason, last_run in started:
+            self.executor.submit(self._run, key, reading, reason, last_run)
+
+        return [(key, reason) for key, _, reason, _ in started]
+
+    def _run(self, key, reading, reason, last_run=None):
+        farmer_id, field_id = key
+        print(f"[sensor_listener] {farmer_id}/{field_id}: {reason}")
+        try:
+            self.run_fn(farmer_id, field_id)
+            with self._lock:
+                self._last_analyzed[key] = reading
+        except Overloaded as e:
+            # Shed by admission control: retry the same trigger later
+            # unless a newer reading is already pending for the field
+            print(f"[sensor_listener] {farmer_id}/{field_id} shed, retry in {e.retry_after}s")
+            with self._lock:
+                if last_run is None:
+                    self._last_run_at.pop(key, None)
+                else:
+                    self._last_run_at[key] = last_run
+                self._pending.setdefault(key, (self.clock() + e.retry_after, reading))
+        except Exception as e:
+            print(f"[sensor_listener] Run failed for {farmer_id}/{field_id}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+
+class _FieldEvent:
+    def __init__(self, path: str, data):
+        self.path = path
+        self.data = data
+
+
+# -------------------------------------------------------
+# Entry point
+# -------------------------------------------------------
+def main(poll_seconds: float = 1.0):
+    from firebase_admin import db
+    from graph import run_field_agent
+    from services.admission import admission, classify
+
+    import tools.firebase_tools  # noqa: F401  (initializes the Firebase app)
+
+    def run_fn(farmer_id, field_id):
+        with admission.slot(classify(farmer_id, field_id)):
+            return run_field_agent(farmer_id, field_id)
+
+    processor = SensorEventProcessor(run_fn=run_fn)
+
+    # RTDB has no wildcard listeners: one stream on "Farmers" covers every
+    # field, including fields added or deleted later. Its initial snapshot
+    # is the whole tree (once per start); later events are only the writes.
+    registration = db.reference("Farmers").listen(processor.dispatch)
+    print("[sensor_listener] Listening to Farmers…")
+
+    try:
+        while True:
+            processor.poll()
+            time.sleep(poll_seconds)
+    except KeyboardInterrupt:
+        registration.close()
+
+
+if __name__ == "__main__":
+    main()